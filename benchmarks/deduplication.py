@@ -0,0 +1,101 @@
+"""Benchmark the union-find deduplication against networkx components.
+
+Run it from the root of the repository::
+
+    python benchmarks/deduplication.py [scale]
+
+The articles of the WoS example export are copied `scale` times (20 by
+default) with their references, then grouped by shared ids with both
+strategies, which must find the same groups. Merging the groups is the
+same for both and is left out.
+"""
+
+import copy
+import sys
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+
+import networkx as nx
+from timing import peak, timed
+
+from bibx.models.article import Article
+from bibx.models.collection import Collection
+from bibx.sources.wos import WosSource
+
+EXAMPLE = Path(__file__).parents[1] / "docs" / "examples" / "bit-pattern-savedrecs.txt"
+
+Groups = tuple[list[list[Article]], dict[str, int]]
+
+
+def networkx_groups(articles: Iterable[Article]) -> Groups:
+    """Group the articles the way the collection did before union-find."""
+    graph = nx.Graph()
+    id_to_article: defaultdict[str, list[Article]] = defaultdict(list)
+    position: dict[int, int] = {}
+    for index, article in enumerate(Collection._all_articles(articles)):
+        if not article.ids:
+            continue
+        position[id(article)] = index
+        first, *rest = article.ids
+        graph.add_edge(first, first)
+        id_to_article[first].append(article)
+        for id_ in rest:
+            graph.add_edge(first, id_)
+            id_to_article[id_].append(article)
+    groups = []
+    group_by_id = {}
+    for ids in nx.connected_components(graph):
+        visited = set()
+        group = []
+        for id_ in ids:
+            for article in id_to_article[id_]:
+                if id(article) not in visited:
+                    group.append(article)
+                    visited.add(id(article))
+        group.sort(key=lambda article: position[id(article)])
+        group_by_id.update(dict.fromkeys(ids, len(groups)))
+        groups.append(group)
+    return groups, group_by_id
+
+
+def union_find_groups(articles: Iterable[Article]) -> Groups:
+    """Group the articles with the collection's union-find engine."""
+    return Collection._group_duplicates(articles)
+
+
+def by_id(groups: Groups) -> dict[str, list[int]]:
+    """Return the objects in the group of every id, to compare groupings."""
+    found, group_by_id = groups
+    return {
+        id_: [id(article) for article in found[index]]
+        for id_, index in group_by_id.items()
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with EXAMPLE.open() as file:
+        example = list(WosSource(file).iter_articles())
+    # Independent copies, so the groups span objects from every copy
+    articles = [article for _ in range(scale) for article in copy.deepcopy(example)]
+    references = sum(len(article.references) for article in articles)
+    print(f"{len(articles)} articles, {references} references")
+    assert by_id(networkx_groups(articles)) == by_id(union_find_groups(articles))
+
+    results = {}
+    for name, func in (
+        ("networkx", networkx_groups),
+        ("union-find", union_find_groups),
+    ):
+        seconds = timed(lambda func=func: func(articles))
+        most = peak(lambda func=func: func(articles))
+        results[name] = seconds, most
+        print(f"{name:>10}: {seconds:.3f}s, peak {most / 2**20:.1f} MiB")
+    (slow, slow_peak), (fast, fast_peak) = results.values()
+    print(f"   speedup: {slow / fast:.2f}x, peak memory {fast_peak / slow_peak:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
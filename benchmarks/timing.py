@@ -0,0 +1,33 @@
+"""Helpers shared by the benchmarks."""
+
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+
+
+def timed(func: Callable[[], object]) -> float:
+    """Return the best of three runs of a function in seconds."""
+    best = float("inf")
+    for _ in range(3):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def peak(func: Callable[[], object]) -> int:
+    """Return the most memory allocated at once by a run of a function."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, most = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return most
@@ -0,0 +1,70 @@
+"""Benchmark the column based WoS tokenizer against the full line pattern.
+
+Run it from the root of the repository::
+
+    python benchmarks/wos_tokenizer.py [scale]
+
+The example export in `docs/examples` is repeated `scale` times (20 by
+default) and each record is tokenized and parsed with both strategies.
+"""
+
+import sys
+from pathlib import Path
+
+from timing import timed
+
+from bibx.exceptions import InvalidIsiLineError
+from bibx.sources.wos import WosSource
+
+EXAMPLE = Path(__file__).parents[1] / "docs" / "examples" / "bit-pattern-savedrecs.txt"
+
+
+def regex_tokenize_line(
+    _cls: type[WosSource], line: str
+) -> tuple[str | None, str | None]:
+    """Tokenize a line the way the source did before the fast path."""
+    match = WosSource.ISI_LINE_PATTERN.match(line)
+    if not match:
+        raise InvalidIsiLineError(line)
+    return match.group("field"), match.group("value")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with EXAMPLE.open() as file:
+        source = WosSource(file)
+        records = [str(record.data) for record in source._get_records_from_files()]
+        records *= scale
+    lines = [line for record in records for line in record.split("\n")]
+    print(f"{len(records)} records, {len(lines)} lines")
+
+    fast = WosSource._tokenize_line
+    slow = classmethod(regex_tokenize_line).__get__(None, WosSource)
+    assert [fast(line) for line in lines] == [slow(line) for line in lines]
+
+    def parse() -> None:
+        for record in records:
+            WosSource._parse_article_from_str(record)
+
+    results = {}
+    for name, tokenize in (("regex", slow), ("columns", fast)):
+        WosSource._tokenize_line = tokenize  # type: ignore
+        results[name] = (
+            timed(lambda tokenize=tokenize: [tokenize(line) for line in lines]),
+            timed(parse),
+        )
+    WosSource._tokenize_line = fast  # type: ignore
+
+    for name, (tokenize_time, parse_time) in results.items():
+        print(f"{name:>8}: tokenize {tokenize_time:.3f}s, parse {parse_time:.3f}s")
+    regex_tokenize, regex_parse = results["regex"]
+    columns_tokenize, columns_parse = results["columns"]
+    print(
+        f" speedup: tokenize {regex_tokenize / columns_tokenize:.2f}x, "
+        f"parse {regex_parse / columns_parse:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
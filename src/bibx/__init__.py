@@ -3,10 +3,20 @@
 import logging
 from typing import TextIO
 
-from bibx.algorithms.sap import Sap
+from bibx.algorithms.sap import (
+    Sap,
+    SapBackend,
+    SapCommunities,
+    SapNumeric,
+    SapSession,
+)
+from bibx.clients.cache import OpenAlexCache
+from bibx.clients.openalex import OpenAlexClient
 from bibx.exceptions import BibXError
 from bibx.models.article import Article
 from bibx.models.collection import Collection
+from bibx.models.graph import CitationGraph
+from bibx.provenance import Provenance, SourceSpan
 from bibx.sources.openalex import EnrichReferences, OpenAlexSource
 from bibx.sources.scopus_bib import ScopusBibSource
 from bibx.sources.scopus_csv import ScopusCsvSource
@@ -17,9 +27,17 @@ logger = logging.getLogger(__name__)
 
 __all__ = [
     "Article",
+    "CitationGraph",
     "Collection",
     "EnrichReferences",
+    "OpenAlexCache",
+    "Provenance",
     "Sap",
+    "SapBackend",
+    "SapCommunities",
+    "SapNumeric",
+    "SapSession",
+    "SourceSpan",
     "query_openalex",
     "read_any",
     "read_scopus_bib",
@@ -35,45 +53,73 @@ def query_openalex(
     query: str,
     limit: int = 600,
     enrich: EnrichReferences = EnrichReferences.BASIC,
+    cache: OpenAlexCache | None = None,
 ) -> Collection:
-    """Query OpenAlex and return a collection."""
-    return OpenAlexSource(query, limit, enrich=enrich).build()
+    """Query OpenAlex and return a collection.
+
+    :param cache: keep the responses of the API to reuse them.
+    """
+    client = OpenAlexClient(cache=cache)
+    return OpenAlexSource(query, limit, enrich=enrich, client=client).build()
 
 
-def read_scopus_bib(*files: TextIO) -> Collection:
+def read_scopus_bib(
+    *files: TextIO,
+    workers: int = 1,
+    provenance: Provenance = Provenance.TEXT,
+) -> Collection:
     """Take any number of bibtex files from scopus and generates a collection.
 
     :param files: Scopus bib files open.
+    :param workers: number of processes used to parse the records.
+    :param provenance: keep a copy of each entry or only where it is found.
     :return: the collection
     """
-    return ScopusBibSource(*files).build()
+    return ScopusBibSource(*files, workers=workers, provenance=provenance).build()
 
 
-def read_scopus_ris(*files: TextIO) -> Collection:
+def read_scopus_ris(
+    *files: TextIO,
+    workers: int = 1,
+    memory_map: bool = False,
+) -> Collection:
     """Take any number of ris files from scopus and generates a collection.
 
     :param files: Scopus bib files open.
+    :param workers: number of processes used to parse the records.
+    :param memory_map: scan the files as bytes through a memory map.
     :return: the collection
     """
-    return ScopusRisSource(*files).build()
+    return ScopusRisSource(*files, workers=workers, memory_map=memory_map).build()
 
 
-def read_scopus_csv(*files: TextIO) -> Collection:
+def read_scopus_csv(*files: TextIO, workers: int = 1) -> Collection:
     """Take any number of csv files from scopus and generates a collection.
 
     :param files: Scopus csv files open.
+    :param workers: number of processes used to parse the records.
     :return: the collection
     """
-    return ScopusCsvSource(*files).build()
+    return ScopusCsvSource(*files, workers=workers).build()
 
 
-def read_wos(*files: TextIO) -> Collection:
+def read_wos(
+    *files: TextIO,
+    workers: int = 1,
+    provenance: Provenance = Provenance.TEXT,
+    memory_map: bool = False,
+) -> Collection:
     """Take any number of wos text files and returns a collection.
 
     :param files: WoS files open.
+    :param workers: number of processes used to parse the records.
+    :param provenance: keep a copy of each record or only where it is found.
+    :param memory_map: scan the files as bytes through a memory map.
     :return: the collection
     """
-    return WosSource(*files).build()
+    return WosSource(
+        *files, workers=workers, provenance=provenance, memory_map=memory_map
+    ).build()
 
 
 def read_any(file: TextIO) -> Collection:
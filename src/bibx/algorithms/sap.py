@@ -1,10 +1,21 @@
 import logging
-from typing import Any, cast
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Sequence
+from enum import Enum
+from typing import Any, TypeVar, cast
 
 import networkx as nx
+from networkx.algorithms.community.label_propagation import (
+    label_propagation_communities,
+)
 from networkx.algorithms.community.louvain import louvain_communities
 
+from bibx.algorithms.sap_arrays import IndexedGraph, top
+from bibx.algorithms.sap_numeric import ARITHMETIC, SapNumeric
+from bibx.algorithms.union_find import UnionFind
 from bibx.models.article import Article
+from bibx.models.citations import CitationIndex, articles_by_key
 from bibx.models.collection import Collection
 
 YEAR = "year"
@@ -17,39 +28,100 @@ LEAF_CONNECTIONS = "_leaf_connections"
 ELABORATE_SAP = "_elaborate_sap"
 ROOT_CONNECTIONS = "_root_connections"
 RAW_SAP = "_raw_sap"
+METADATA = "metadata"
+NUMERIC = "numeric"
 MIN_LEAF_CONNECTIONS = 3
 MAX_LEAF_AGE_YEARS = 7
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def _limit(attribute: list[tuple[Any, int]], _max: int) -> list[tuple[Any, int]]:
-    if _max is not None:
-        sorted_attribute = sorted(attribute, key=lambda x: x[1], reverse=True)
-        attribute = sorted_attribute[:_max]
-    return attribute
+    return top(attribute, _max)
 
 
-def _add_article_info(g: nx.DiGraph, article: Article) -> None:
-    for key, val in article.info().items():
-        if key in ("sources", "references") or key.startswith("_"):
-            continue
-        try:
-            g.nodes[article.key][key] = val
-        except KeyError:
-            g.add_node(article.key, **{key: val})
+class SapBackend(Enum):
+    """How to compute the root, leaf, sap and trunk labels of a tree."""
+
+    NETWORKX = "networkx"
+    ARRAYS = "arrays"
+
+
+def _article_info(article: Article) -> dict[str, Any]:
+    return {
+        key: val
+        for key, val in article.info().items()
+        if key not in ("sources", "references") and not key.startswith("_")
+    }
+
+
+def _add_articles(
+    g: nx.DiGraph,
+    articles: dict[str, Article],
+    *,
+    lean: bool,
+) -> None:
+    """Add the properties of the articles to their nodes."""
+    g.add_nodes_from(articles)
+    if lean:
+        for node, article in articles.items():
+            g.nodes[node][YEAR] = article.year
+        g.graph[METADATA] = articles
+        return
+    for node, article in articles.items():
+        g.nodes[node].update(_article_info(article))
+
+
+def _count_paths(label: Callable[[SapNumeric], T], numeric: SapNumeric) -> T:
+    """Label a tree with some numbers, with logarithms if floats overflow."""
+    try:
+        return label(numeric)
+    except OverflowError:
+        if numeric is not SapNumeric.FLOAT:
+            raise
+        logger.info("The path counts overflow as floats, using logarithms")
+        return label(SapNumeric.LOG)
+
+
+def _set_labels(
+    g: nx.DiGraph,
+    nodes: list[str],
+    labels: Iterable[tuple[str, Sequence[float]]],
+) -> None:
+    """Set the labels of the nodes of a graph from lists in node order."""
+    labels = list(labels)
+    for i, node in enumerate(nodes):
+        data = g.nodes[node]
+        for name, values in labels:
+            data[name] = values[i]
+
+
+class SapCommunities(Enum):
+    """How to find the communities the branches of a tree are taken from."""
+
+    LOUVAIN = "louvain"
+    LABEL_PROPAGATION = "label_propagation"
 
 
 class Sap:
     """Sap algorithm to classify nodes in a graph."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         max_roots: int = 20,
         max_leaves: int = 50,
         max_trunk: int = 20,
         max_branch_size: int = 15,
+        backend: SapBackend = SapBackend.NETWORKX,
+        numeric: SapNumeric = SapNumeric.EXACT,
+        *,
+        communities: SapCommunities = SapCommunities.LOUVAIN,
+        seed: int | None = None,
+        resolution: float = 1,
+        min_branch_sap: int | None = None,
     ) -> None:
         """Create a Sap instance with the given parameters.
 
@@ -59,6 +131,16 @@ class Sap:
         :param min_leaf_connections: minimum number of connections between
                                      leaves and roots
         :param max_leaf_age: maximum age for a leaf
+        :param backend: walk the graph with networkx or on integer indexed
+                        lists, both give the same labels
+        :param numeric: how to count the paths between roots and leaves,
+                        approximate counts keep the order of the nodes
+        :param communities: algorithm used to find the branches
+        :param seed: random seed of the louvain communities
+        :param resolution: resolution of the louvain communities, larger
+                           values give smaller communities
+        :param min_branch_sap: only look for branches among the nodes with at
+                               least this sap, all nodes are used if `None`
         """
         self.max_roots = max_roots
         self.max_leaves = max_leaves
@@ -66,25 +148,105 @@ class Sap:
         self.max_branch_size = max_branch_size
         self.min_leaf_connections = MIN_LEAF_CONNECTIONS
         self.max_leaf_age = MAX_LEAF_AGE_YEARS
+        self.backend = backend
+        self.numeric = numeric
+        self.communities = communities
+        self.seed = seed
+        self.resolution = resolution
+        self.min_branch_sap = min_branch_sap
+        # Seconds taken by each step of the last tree
+        self.timings: dict[str, float] = {}
 
     @staticmethod
-    def create_graph(collection: Collection) -> nx.DiGraph:
+    def create_graph(collection: Collection, *, lean: bool = False) -> nx.DiGraph:
         """Create a `networkx.DiGraph` from a `Collection`.
 
         It uses the article label as a key and adds all the properties of the
         article to the graph.
 
         :param collection: a `bibx.Collection` instance.
+        :param lean: only keep the year on the nodes, the article of every
+                     node is kept in a table in `graph.graph["metadata"]`
+                     that is shared by all copies of the graph, see
+                     `Sap.join_metadata`.
         :return: a `networkx.DiGraph` instance.
         """
         g = nx.DiGraph()
-        g.add_edges_from((u.key, v.key) for u, v in collection.citation_pairs)
-        for article in collection.articles:
-            for reference in article.references:
-                _add_article_info(g, reference)
-        for article in collection.articles:
-            _add_article_info(g, article)
-        g.remove_edges_from(nx.selfloop_edges(g))
+        # The references may have changed since the cached index was built
+        citations = CitationIndex(collection.articles)
+        g.add_nodes_from(citations.keys())
+        g.add_edges_from(citations.edges())
+        _add_articles(g, articles_by_key(collection.articles), lean=lean)
+        return g
+
+    @staticmethod
+    def create_clean_graph(collection: Collection, *, lean: bool = False) -> nx.DiGraph:
+        """Create the cleaned graph of a `Collection` without the full graph.
+
+        The result is the same as `Sap.clean_graph(Sap.create_graph(...))`,
+        but the degrees and components of the nodes are found from the
+        citations first, so the nodes that would be dropped by the cleaning,
+        most of them references cited only once, are never added.
+
+        :param collection: a `bibx.Collection` instance.
+        :param lean: only keep the year on the nodes, see `Sap.create_graph`.
+        :return: cleaned up giant component.
+        """
+        citations = CitationIndex(collection.articles)
+        articles = articles_by_key(collection.articles)
+        # Every node, in the order they are added by `create_graph`
+        keys = list(dict.fromkeys([*citations.keys(), *articles]))
+        index = {key: i for i, key in enumerate(keys)}
+        components = UnionFind()
+        for _ in keys:
+            components.add()
+        cites: dict[str, list[str]] = {}
+        cited = [0] * len(keys)
+        for source, target in citations.edges():
+            cites.setdefault(source, []).append(target)
+            cited[index[target]] += 1
+            components.union(index[source], index[target])
+
+        # The giant component is the largest one, the first one on ties
+        roots = list(components.roots())
+        sizes = Counter(roots)
+        giant = max(sizes, key=sizes.__getitem__)
+        kept = [
+            key
+            for key, root, count in zip(keys, roots, cited, strict=True)
+            if root == giant and not (count == 1 and key not in cites)
+        ]
+
+        g = nx.DiGraph()
+        g.add_nodes_from(kept)
+        nodes = set(kept)
+        # Edges go by source like in a copy of a subgraph of the full graph
+        g.add_edges_from(
+            (source, target)
+            for source in kept
+            for target in cites.get(source, ())
+            if target in nodes
+        )
+        _add_articles(g, {key: articles[key] for key in kept}, lean=lean)
+        Sap._break_loops(g)
+        return g
+
+    @staticmethod
+    def join_metadata(graph: nx.DiGraph) -> nx.DiGraph:
+        """Return a copy of a lean graph with the properties of its articles.
+
+        The nodes end up with the attributes they would have had without
+        `lean` in `Sap.create_graph`, followed by their labels.
+        """
+        g = cast(nx.DiGraph, graph.copy())
+        metadata: dict[str, Article] = g.graph.pop(METADATA, {})
+        for node, data in g.nodes.items():
+            article = metadata.get(node)
+            if article is not None:
+                labels = dict(data)
+                data.clear()
+                data.update(_article_info(article))
+                data.update(labels)
         return g
 
     @staticmethod
@@ -94,39 +256,128 @@ class Sap:
         :param g: graph with unnecessary nodes
         :return: cleaned up giant component
         """
-        # Extract the giant component of the graph
+        # Extract the giant component of the graph, keeping the order of the
+        # nodes and edges, which a subgraph only does for large components
         giant_component_nodes = max(nx.weakly_connected_components(g), key=len)
-        giant: nx.DiGraph = cast(nx.DiGraph, g.subgraph(giant_component_nodes).copy())
+        giant = nx.DiGraph()
+        giant.graph.update(g.graph)
+        giant.add_nodes_from(
+            (n, dict(d)) for n, d in g.nodes.items() if n in giant_component_nodes
+        )
+        giant.add_edges_from(
+            (u, v, dict(d))
+            for u, v, d in g.edges(data=True)
+            if u in giant_component_nodes
+        )
 
         # Remove nodes that cite one element and are never cited themselves
         giant.remove_nodes_from(
             [n for n in giant if giant.in_degree(n) == 1 and giant.out_degree(n) == 0]
         )
 
-        # Break loops
-        loops = [
-            loop for loop in nx.strongly_connected_components(giant) if len(loop) > 1
-        ]
-        for loop in loops:
-            giant.remove_edges_from([(u, v) for u in loop for v in loop])
+        Sap._break_loops(giant)
+
+        # Only keep the articles of the remaining nodes of lean graphs
+        metadata: dict[str, Article] | None = giant.graph.get(METADATA)
+        if metadata is not None:
+            giant.graph[METADATA] = {n: metadata[n] for n in giant if n in metadata}
 
         return giant
 
-    def tree(self, graph: nx.DiGraph) -> nx.DiGraph:
-        """Compute the whole tree."""
-        graph = cast(nx.DiGraph, graph.copy())
-        graph = self._compute_root(graph)
-        graph = self._compute_leaves(graph)
-        graph = self._compute_sap(graph)
-        graph = self._compute_trunk(graph)
-        return self._compute_branches(graph)
+    @staticmethod
+    def _break_loops(g: nx.DiGraph) -> None:
+        """Remove the edges between the nodes of every loop."""
+        loops = [loop for loop in nx.strongly_connected_components(g) if len(loop) > 1]
+        for loop in loops:
+            g.remove_edges_from([(u, v) for u in loop for v in loop])
+
+    def tree(self, graph: nx.DiGraph, *, in_place: bool = False) -> nx.DiGraph:
+        """Compute the whole tree.
+
+        :param graph: cleaned graph to label.
+        :param in_place: label the given graph instead of a copy of it.
+        :return: the labeled graph.
+        """
+        g = graph if in_place else cast(nx.DiGraph, graph.copy())
+        self.timings = {}
+        start = time.perf_counter()
+
+        def label(numeric: SapNumeric) -> None:
+            g.graph[NUMERIC] = numeric
+            if self.backend == SapBackend.ARRAYS:
+                self._label_arrays(g)
+            else:
+                self._label_networkx(g)
+
+        _count_paths(label, self.numeric)
+        self.timings["labels"] = time.perf_counter() - start
+        self._label_branches(g)
+        return g
+
+    def _numeric(self, g: nx.DiGraph) -> SapNumeric:
+        """Return the numbers the paths of a graph are counted with."""
+        return g.graph.get(NUMERIC, self.numeric)
+
+    def _label_networkx(self, g: nx.DiGraph) -> None:
+        """Label a graph with the root, leaf, sap and trunk properties in place."""
+        self._label_root(g)
+        self._label_leaves(g)
+        self._label_elaborate_sap(g, self._numeric(g))
+        self._label_sap(g, self._numeric(g))
+        self._label_trunk(g)
+
+    def _label_arrays(self, g: nx.DiGraph) -> None:
+        """Label a graph with the root, leaf, sap and trunk properties.
+
+        The graph is walked once in topological order towards the roots and
+        once towards the leaves, on lists indexed by node number.
+        """
+        arithmetic = ARITHMETIC[self._numeric(g)]
+        indexed = IndexedGraph(g, YEAR)
+        root = indexed.roots(self.max_roots)
+        root_connections, raw_sap = indexed.root_connections(root, arithmetic)
+        leaf = indexed.leaves(
+            root_connections,
+            self.max_leaves,
+            self.min_leaf_connections,
+            self.max_leaf_age,
+            arithmetic,
+        )
+        leaf_connections, elaborate_sap = indexed.leaf_connections(leaf, arithmetic)
+        sap = [
+            arithmetic.combine(lc, raw, rc, elaborate)
+            for lc, raw, rc, elaborate in zip(
+                leaf_connections, raw_sap, root_connections, elaborate_sap, strict=True
+            )
+        ]
+        trunk = indexed.trunk(root, leaf, sap, self.max_trunk)
+
+        _set_labels(
+            g,
+            indexed.nodes,
+            (
+                (ROOT, root),
+                (ROOT_CONNECTIONS, root_connections),
+                (RAW_SAP, raw_sap),
+                (LEAF, leaf),
+                (ELABORATE_SAP, elaborate_sap),
+                (LEAF_CONNECTIONS, leaf_connections),
+                (SAP, sap),
+                (TRUNK, trunk),
+            ),
+        )
 
     def _compute_root(self, graph: nx.DiGraph) -> nx.DiGraph:
-        """Label a graph with the root property.
+        """Label a copy of a graph with the root property.
 
         :return: Labeled graph with the root property.
         """
         g = cast(nx.DiGraph, graph.copy())
+        self._label_root(g)
+        return g
+
+    def _label_root(self, g: nx.DiGraph) -> None:
+        """Label a graph with the root property."""
         valid_roots = [
             (n, cast(int, g.in_degree(n))) for n in g.nodes if g.out_degree(n) == 0
         ]
@@ -134,15 +385,30 @@ class Sap:
         nx.set_node_attributes(g, 0, ROOT)  # type: ignore
         for node, degree in sorted_roots:
             g.nodes[node][ROOT] = degree
-        return g
 
     def _compute_leaves(self, graph: nx.DiGraph) -> nx.DiGraph:
-        """Label a graph with the leaf property.
+        """Label a copy of a graph with the leaf property.
 
         :param graph: Connected and filtered graph to work with.
         :return: Labeled graph with the leaf property.
         """
         g = cast(nx.DiGraph, graph.copy())
+        self._label_leaves(g)
+        return g
+
+    def _label_leaves(self, g: nx.DiGraph) -> None:
+        """Label a graph with the leaf property.
+
+        The leaves are chosen by their connections to the roots, which are
+        propagated along with the raw sap, so it is not computed again.
+        """
+        Sap._check_roots(g)
+        Sap._label_raw_sap(g, self._numeric(g))
+        self._select_leaves(g)
+
+    @staticmethod
+    def _check_roots(g: nx.DiGraph) -> None:
+        """Fail unless a graph is labeled with some roots."""
         try:
             roots = [n for n, d in g.nodes.items() if d[ROOT] > 0]
         except AttributeError as e:
@@ -152,17 +418,8 @@ class Sap:
             message = "It's necessary to have some roots"
             raise TypeError(message)
 
-        nx.set_node_attributes(g, 0, ROOT_CONNECTIONS)  # type: ignore
-        for node in roots:
-            g.nodes[node][ROOT_CONNECTIONS] = 1
-        topological_order = list(nx.topological_sort(g))
-        for node in reversed(topological_order):
-            nbs = list(g.successors(node))
-            if nbs:
-                g.nodes[node][ROOT_CONNECTIONS] = sum(
-                    g.nodes[n][ROOT_CONNECTIONS] for n in nbs
-                )
-
+    def _select_leaves(self, g: nx.DiGraph) -> None:
+        """Label the leaves of a graph from their connections to the roots."""
         potential_leaves = [
             (node, g.nodes[node][ROOT_CONNECTIONS])
             for node in g.nodes
@@ -171,9 +428,8 @@ class Sap:
         extended_leaves = potential_leaves[:]
 
         if self.min_leaf_connections is not None:
-            potential_leaves = [
-                (n, c) for n, c in potential_leaves if c >= self.min_leaf_connections
-            ]
+            least = ARITHMETIC[self._numeric(g)].value(self.min_leaf_connections)
+            potential_leaves = [(n, c) for n, c in potential_leaves if c >= least]
 
         if self.max_leaf_age is not None:
             potential_leaves = [
@@ -201,12 +457,26 @@ class Sap:
         nx.set_node_attributes(g, 0, LEAF)  # type: ignore
         for node, c in potential_leaves:
             g.nodes[node][LEAF] = c
-        return g
 
     @staticmethod
-    def _raw_sap(graph: nx.DiGraph) -> nx.DiGraph:
-        """Compute the raw sap of each node."""
+    def _raw_sap(
+        graph: nx.DiGraph, numeric: SapNumeric = SapNumeric.EXACT
+    ) -> nx.DiGraph:
+        """Compute the raw sap of each node on a copy of a graph."""
         g = cast(nx.DiGraph, graph.copy())
+        Sap._label_raw_sap(g, numeric)
+        return g
+
+    @staticmethod
+    def _label_raw_sap(
+        g: nx.DiGraph,
+        numeric: SapNumeric = SapNumeric.EXACT,
+        order: list[Any] | None = None,
+    ) -> None:
+        """Compute the raw sap and root connections of each node.
+
+        :param order: the nodes in topological order, if already known.
+        """
         try:
             valid_root = [n for n, d in g.nodes.items() if d[ROOT] > 0]
         except AttributeError as e:
@@ -219,23 +489,40 @@ class Sap:
         nx.set_node_attributes(g, 0, ROOT_CONNECTIONS)  # type: ignore
         nx.set_node_attributes(g, 0, RAW_SAP)  # type: ignore
 
+        arithmetic = ARITHMETIC[numeric]
         for node in valid_root:
-            g.nodes[node][RAW_SAP] = g.nodes[node][ROOT]
-            g.nodes[node][ROOT_CONNECTIONS] = 1
-        for node in reversed(list(nx.topological_sort(g))):
+            g.nodes[node][RAW_SAP] = arithmetic.value(g.nodes[node][ROOT])
+            g.nodes[node][ROOT_CONNECTIONS] = arithmetic.value(1)
+        if order is None:
+            order = list(nx.topological_sort(g))
+        for node in reversed(order):
             neighbors = list(g.successors(node))
             if not neighbors:
                 continue
             for attr in (RAW_SAP, ROOT_CONNECTIONS):
-                g.nodes[node][attr] = sum(g.nodes[nb][attr] for nb in neighbors)
+                g.nodes[node][attr] = arithmetic.total(
+                    g.nodes[nb][attr] for nb in neighbors
+                )
 
+    @staticmethod
+    def _elaborate_sap(
+        graph: nx.DiGraph, numeric: SapNumeric = SapNumeric.EXACT
+    ) -> nx.DiGraph:
+        """Compute the elaborate sap of each node on a copy of a graph."""
+        g = Sap._raw_sap(graph, numeric)
+        Sap._label_elaborate_sap(g, numeric)
         return g
 
     @staticmethod
-    def _elaborate_sap(graph: nx.DiGraph) -> nx.DiGraph:
-        """Compute the elaborate sap of each node."""
-        g = Sap._raw_sap(graph)
+    def _label_elaborate_sap(
+        g: nx.DiGraph,
+        numeric: SapNumeric = SapNumeric.EXACT,
+        order: list[Any] | None = None,
+    ) -> None:
+        """Compute the elaborate sap and leaf connections of each node.
 
+        :param order: the nodes in topological order, if already known.
+        """
         try:
             valid_leaf = [n for n, d in g.nodes.items() if d[LEAF] > 0]
         except AttributeError as e:
@@ -247,35 +534,48 @@ class Sap:
 
         nx.set_node_attributes(g, 0, ELABORATE_SAP)  # type: ignore
         nx.set_node_attributes(g, 0, LEAF_CONNECTIONS)  # type: ignore
+        arithmetic = ARITHMETIC[numeric]
         for node in valid_leaf:
             g.nodes[node][ELABORATE_SAP] = g.nodes[node][LEAF]
-            g.nodes[node][LEAF_CONNECTIONS] = 1
-        for node in nx.topological_sort(g):
+            g.nodes[node][LEAF_CONNECTIONS] = arithmetic.value(1)
+        for node in nx.topological_sort(g) if order is None else order:
             neighbors = list(g.predecessors(node))
             if neighbors:
                 for attr in (ELABORATE_SAP, LEAF_CONNECTIONS):
-                    g.nodes[node][attr] = sum(g.nodes[nb][attr] for nb in neighbors)
+                    g.nodes[node][attr] = arithmetic.total(
+                        g.nodes[nb][attr] for nb in neighbors
+                    )
 
+    @staticmethod
+    def _compute_sap(
+        graph: nx.DiGraph, numeric: SapNumeric = SapNumeric.EXACT
+    ) -> nx.DiGraph:
+        """Compute the sap of each node on a copy of a graph."""
+        g = Sap._elaborate_sap(graph, numeric)
+        Sap._label_sap(g, numeric)
         return g
 
     @staticmethod
-    def _compute_sap(graph: nx.DiGraph) -> nx.DiGraph:
-        """Compute the sap of each node."""
-        g = Sap._raw_sap(graph)
-        g = Sap._elaborate_sap(g)
-
+    def _label_sap(g: nx.DiGraph, numeric: SapNumeric = SapNumeric.EXACT) -> None:
+        """Compute the sap of each node from its raw and elaborate sap."""
+        combine = ARITHMETIC[numeric].combine
         nx.set_node_attributes(g, 0, SAP)  # type: ignore
         for node in g.nodes:
-            g.nodes[node][SAP] = (
-                g.nodes[node][LEAF_CONNECTIONS] * g.nodes[node][RAW_SAP]
-                + g.nodes[node][ROOT_CONNECTIONS] * g.nodes[node][ELABORATE_SAP]
+            g.nodes[node][SAP] = combine(
+                g.nodes[node][LEAF_CONNECTIONS],
+                g.nodes[node][RAW_SAP],
+                g.nodes[node][ROOT_CONNECTIONS],
+                g.nodes[node][ELABORATE_SAP],
             )
 
-        return g
-
     def _compute_trunk(self, graph: nx.DiGraph) -> nx.DiGraph:
-        """Tags leaves."""
+        """Tags trunk nodes on a copy of a graph."""
         g = cast(nx.DiGraph, graph.copy())
+        self._label_trunk(g)
+        return g
+
+    def _label_trunk(self, g: nx.DiGraph) -> None:
+        """Tags trunk nodes."""
         try:
             potential_trunk = [
                 (n, d[SAP])
@@ -293,13 +593,48 @@ class Sap:
         nx.set_node_attributes(g, 0, TRUNK)  # type: ignore
         for node, sap in potential_trunk:
             g.nodes[node][TRUNK] = sap
-        return g
 
     def _compute_branches(self, graph: nx.DiGraph) -> nx.DiGraph:
-        """Tags branches."""
+        """Tags branches on a copy of a graph."""
         g = cast(nx.DiGraph, graph.copy())
-        undirected = g.to_undirected()
-        communities: list[set] = louvain_communities(undirected)
+        self._label_branches(g)
+        return g
+
+    def _branch_nodes(self, g: nx.DiGraph) -> list[str]:
+        """Return the nodes to look for branches in."""
+        if self.min_branch_sap is None:
+            return list(g)
+        least = ARITHMETIC[self._numeric(g)].value(self.min_branch_sap)
+        return [n for n, d in g.nodes.items() if d[SAP] >= least]
+
+    def _find_communities(self, g: nx.DiGraph, nodes: list[str]) -> list[set]:
+        """Find the communities of the undirected graph among some nodes."""
+        kept = set(nodes)
+        # Communities only need the edges, leave the node attributes behind
+        undirected = nx.Graph()
+        undirected.add_nodes_from(nodes)
+        undirected.add_edges_from(
+            (u, v, d) for u, v, d in g.edges(data=True) if u in kept and v in kept
+        )
+        if self.communities == SapCommunities.LABEL_PROPAGATION:
+            return list(label_propagation_communities(undirected))
+        return louvain_communities(
+            undirected, resolution=self.resolution, seed=self.seed
+        )
+
+    def _label_branches(
+        self, g: nx.DiGraph, communities: list[set] | None = None
+    ) -> None:
+        """Tags branches, finding the communities unless they are given."""
+        if communities is None:
+            start = time.perf_counter()
+            communities = self._find_communities(g, self._branch_nodes(g))
+            self.timings["communities"] = time.perf_counter() - start
+            logger.info(
+                "Found %d communities in %.3fs",
+                len(communities),
+                self.timings["communities"],
+            )
         branches = sorted(communities, key=len)[:3]
         nx.set_node_attributes(g, 0, BRANCH)  # type: ignore
         for i, branch in enumerate(branches, start=1):
@@ -313,7 +648,6 @@ class Sap:
             potential_branch = _limit(potential_branch, self.max_branch_size)
             for node, _ in potential_branch:
                 g.nodes[node][BRANCH] = i
-        return g
 
     @staticmethod
     def clear(graph: nx.DiGraph) -> nx.DiGraph:
@@ -326,3 +660,178 @@ class Sap:
             and graph.nodes[n][LEAF] > 0
         ]
         return cast(nx.DiGraph, graph.subgraph(nodes))
+
+
+_RootsKey = tuple[SapBackend, int | None, SapNumeric]
+_LeavesKey = tuple[
+    SapBackend, int | None, SapNumeric, int | None, int | None, int | None
+]
+_CommunitiesKey = tuple[tuple[str, ...], SapCommunities, int | None, float]
+
+
+class SapSession:
+    """Compute sap trees of the same graph with different parameters.
+
+    The graph is cleaned once and the communities are kept for every set of
+    nodes and parameters they are looked for with. With either backend the
+    topological order is computed once, the connections to the roots are
+    kept for every number of roots and the connections to the leaves for
+    every choice of leaves, so sweeping the size of the trunk or of the
+    branches only redoes the selection of the nodes.
+
+    Every tree is the one `Sap.tree` gives for the same parameters and
+    backend, with the communities found the first time they are needed.
+    """
+
+    def __init__(self, graph: nx.DiGraph, *, clean: bool = True) -> None:
+        """Create a session for a graph.
+
+        :param graph: graph to compute the trees of.
+        :param clean: clean the graph first, see `Sap.clean_graph`.
+        """
+        self.graph = Sap.clean_graph(graph) if clean else graph
+        self._indexed: IndexedGraph | None = None
+        self._nodes: list[Any] | None = None
+        self._order: list[Any] | None = None
+        self._roots: dict[_RootsKey, tuple[list[int], list[float], list[float]]] = {}
+        self._leaves: dict[
+            _LeavesKey, tuple[list[float], list[float], list[float], list[float]]
+        ] = {}
+        self._communities: dict[_CommunitiesKey, list[set]] = {}
+
+    def tree(self, sap: Sap) -> nx.DiGraph:
+        """Return a labeled copy of the graph with the parameters of a `Sap`.
+
+        The `timings` of the `Sap` are set like in `Sap.tree`, without the
+        communities when they are reused.
+        """
+        sap.timings = {}
+        start = time.perf_counter()
+        g = _count_paths(lambda numeric: self._label(sap, numeric), sap.numeric)
+        sap.timings["labels"] = time.perf_counter() - start
+
+        nodes = sap._branch_nodes(g)
+        # Everything the communities depend on besides the graph
+        communities_key = (tuple(nodes), sap.communities, sap.seed, sap.resolution)
+        if communities_key not in self._communities:
+            start = time.perf_counter()
+            self._communities[communities_key] = sap._find_communities(g, nodes)
+            sap.timings["communities"] = time.perf_counter() - start
+            logger.info(
+                "Found %d communities in %.3fs",
+                len(self._communities[communities_key]),
+                sap.timings["communities"],
+            )
+        sap._label_branches(g, self._communities[communities_key])
+        return g
+
+    def _label(self, sap: Sap, numeric: SapNumeric) -> nx.DiGraph:
+        """Return a copy of the graph labeled with some numbers."""
+        if sap.backend == SapBackend.ARRAYS:
+            return self._label_arrays(sap, numeric)
+        return self._label_networkx(sap, numeric)
+
+    def _label_networkx(self, sap: Sap, numeric: SapNumeric) -> nx.DiGraph:
+        """Return a copy of the graph labeled reusing the steps kept."""
+        if self._nodes is None or self._order is None:
+            self._nodes = list(self.graph)
+            self._order = list(nx.topological_sort(self.graph))
+        nodes, order = self._nodes, self._order
+        g = cast(nx.DiGraph, self.graph.copy())
+        g.graph[NUMERIC] = numeric
+
+        roots_key = (SapBackend.NETWORKX, sap.max_roots, numeric)
+        roots = (ROOT, ROOT_CONNECTIONS, RAW_SAP)
+        if roots_key in self._roots:
+            _set_labels(g, nodes, zip(roots, self._roots[roots_key], strict=True))
+        else:
+            sap._label_root(g)
+            Sap._check_roots(g)
+            Sap._label_raw_sap(g, numeric, order)
+            self._roots[roots_key] = (
+                [g.nodes[n][ROOT] for n in nodes],
+                [g.nodes[n][ROOT_CONNECTIONS] for n in nodes],
+                [g.nodes[n][RAW_SAP] for n in nodes],
+            )
+
+        leaves_key = (
+            *roots_key,
+            sap.max_leaves,
+            sap.min_leaf_connections,
+            sap.max_leaf_age,
+        )
+        leaves = (LEAF, LEAF_CONNECTIONS, ELABORATE_SAP, SAP)
+        if leaves_key in self._leaves:
+            _set_labels(g, nodes, zip(leaves, self._leaves[leaves_key], strict=True))
+        else:
+            sap._select_leaves(g)
+            Sap._label_elaborate_sap(g, numeric, order)
+            Sap._label_sap(g, numeric)
+            self._leaves[leaves_key] = (
+                [g.nodes[n][LEAF] for n in nodes],
+                [g.nodes[n][LEAF_CONNECTIONS] for n in nodes],
+                [g.nodes[n][ELABORATE_SAP] for n in nodes],
+                [g.nodes[n][SAP] for n in nodes],
+            )
+        sap._label_trunk(g)
+        return g
+
+    def _label_arrays(self, sap: Sap, numeric: SapNumeric) -> nx.DiGraph:
+        """Return a copy of the graph labeled reusing the steps kept."""
+        if self._indexed is None:
+            self._indexed = IndexedGraph(self.graph, YEAR)
+        indexed = self._indexed
+        arithmetic = ARITHMETIC[numeric]
+
+        roots_key = (SapBackend.ARRAYS, sap.max_roots, numeric)
+        if roots_key not in self._roots:
+            root = indexed.roots(sap.max_roots)
+            self._roots[roots_key] = (root, *indexed.root_connections(root, arithmetic))
+        root, root_connections, raw_sap = self._roots[roots_key]
+
+        leaves_key = (
+            *roots_key,
+            sap.max_leaves,
+            sap.min_leaf_connections,
+            sap.max_leaf_age,
+        )
+        if leaves_key not in self._leaves:
+            leaf = indexed.leaves(
+                root_connections,
+                sap.max_leaves,
+                sap.min_leaf_connections,
+                sap.max_leaf_age,
+                arithmetic,
+            )
+            leaf_connections, elaborate_sap = indexed.leaf_connections(leaf, arithmetic)
+            values = [
+                arithmetic.combine(lc, raw, rc, elaborate)
+                for lc, raw, rc, elaborate in zip(
+                    leaf_connections,
+                    raw_sap,
+                    root_connections,
+                    elaborate_sap,
+                    strict=True,
+                )
+            ]
+            self._leaves[leaves_key] = (leaf, leaf_connections, elaborate_sap, values)
+        leaf, leaf_connections, elaborate_sap, values = self._leaves[leaves_key]
+        trunk = indexed.trunk(root, leaf, values, sap.max_trunk)
+
+        g = cast(nx.DiGraph, self.graph.copy())
+        g.graph[NUMERIC] = numeric
+        _set_labels(
+            g,
+            indexed.nodes,
+            (
+                (ROOT, root),
+                (ROOT_CONNECTIONS, root_connections),
+                (RAW_SAP, raw_sap),
+                (LEAF, leaf),
+                (ELABORATE_SAP, elaborate_sap),
+                (LEAF_CONNECTIONS, leaf_connections),
+                (SAP, values),
+                (TRUNK, trunk),
+            ),
+        )
+        return g
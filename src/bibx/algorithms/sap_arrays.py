@@ -0,0 +1,186 @@
+"""Sap stages on integer indexed lists instead of networkx node attributes."""
+
+import logging
+from heapq import nlargest
+from operator import itemgetter
+from typing import TypeVar
+
+import networkx as nx
+
+from .sap_numeric import Arithmetic
+
+T = TypeVar("T")
+N = TypeVar("N", int, float)
+
+logger = logging.getLogger(__name__)
+
+
+def top(items: list[tuple[T, N]], limit: int | None) -> list[tuple[T, N]]:
+    """Return the items with the largest values, the first ones on ties.
+
+    This is the same as sorting the items by value in reverse and keeping
+    the first `limit`, without sorting all of them.
+    """
+    if limit is None:
+        return items
+    return nlargest(limit, items, key=itemgetter(1))
+
+
+class IndexedGraph:
+    """The nodes of a `networkx.DiGraph` numbered in order, with their edges.
+
+    The stages of the sap algorithm run on lists indexed by node number, so
+    node attributes are only read once and written back once. The
+    topological order is computed once and shared by every propagation.
+    """
+
+    __slots__ = ("_order", "nodes", "predecessors", "successors", "years")
+
+    def __init__(self, graph: nx.DiGraph, year: str = "year") -> None:
+        self.nodes = list(graph)
+        index = {node: i for i, node in enumerate(self.nodes)}
+        self.successors = [[index[m] for m in graph.successors(n)] for n in self.nodes]
+        self.predecessors = [
+            [index[m] for m in graph.predecessors(n)] for n in self.nodes
+        ]
+        self.years: list[int | None] = [graph.nodes[n].get(year) for n in self.nodes]
+        self._order: list[int] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of nodes."""
+        return len(self.nodes)
+
+    def topological_order(self) -> list[int]:
+        """Return the nodes so that every node comes before the ones it cites."""
+        if self._order is not None:
+            return self._order
+        missing = [len(predecessors) for predecessors in self.predecessors]
+        order = [i for i, count in enumerate(missing) if count == 0]
+        for i in order:
+            for j in self.successors[i]:
+                missing[j] -= 1
+                if missing[j] == 0:
+                    order.append(j)
+        if len(order) < len(self.nodes):
+            message = "Graph contains a cycle or graph changed during iteration"
+            raise nx.NetworkXUnfeasible(message)
+        self._order = order
+        return order
+
+    def roots(self, limit: int | None) -> list[int]:
+        """Return the root value of every node, its in degree if it is a root."""
+        candidates = [
+            (i, len(self.predecessors[i]))
+            for i in range(len(self.nodes))
+            if not self.successors[i]
+        ]
+        root = [0] * len(self.nodes)
+        for i, degree in top(candidates, limit):
+            root[i] = degree
+        return root
+
+    def root_connections(
+        self,
+        root: list[int],
+        arithmetic: type[Arithmetic] = Arithmetic,
+    ) -> tuple[list[float], list[float]]:
+        """Propagate the roots to the articles citing them.
+
+        :return: the number of paths from every node to the roots and its
+                 raw sap.
+        """
+        if not any(value > 0 for value in root):
+            message = "It's necessary to have some roots"
+            raise TypeError(message)
+        value, total = arithmetic.value, arithmetic.total
+        connections = [value(1 if v > 0 else 0) for v in root]
+        raw = [value(v) for v in root]
+        successors = self.successors
+        for i in reversed(self.topological_order()):
+            cited = successors[i]
+            if cited:
+                connections[i] = total(connections[j] for j in cited)
+                raw[i] = total(raw[j] for j in cited)
+        return connections, raw
+
+    def leaves(
+        self,
+        connections: list[float],
+        limit: int | None,
+        min_connections: int | None,
+        max_age: int | None,
+        arithmetic: type[Arithmetic] = Arithmetic,
+    ) -> list[float]:
+        """Return the leaf value of every node, its root connections if a leaf."""
+        candidates = [
+            (i, connections[i])
+            for i in range(len(self.nodes))
+            if not self.predecessors[i]
+        ]
+        extended = candidates[:]
+        if min_connections is not None:
+            least = arithmetic.value(min_connections)
+            candidates = [(i, c) for i, c in candidates if c >= least]
+        if max_age is not None:
+            years = self.years
+            newest = max(year for i, _ in candidates if (year := years[i]))
+            earliest = newest - max_age
+            candidates = [
+                (i, c)
+                for i, c in candidates
+                if (year := years[i]) is not None and year >= earliest
+            ]
+        if not candidates:
+            logger.info(
+                "Reverting leaf cut policies, as they remove all possible leaves"
+            )
+            candidates = extended
+        leaf: list[float] = [0] * len(self.nodes)
+        for i, c in top(candidates, limit):
+            leaf[i] = c
+        return leaf
+
+    def leaf_connections(
+        self,
+        leaf: list[float],
+        arithmetic: type[Arithmetic] = Arithmetic,
+    ) -> tuple[list[float], list[float]]:
+        """Propagate the leaves to the articles they cite.
+
+        :return: the number of paths from the leaves to every node and its
+                 elaborate sap.
+        """
+        if not any(value > 0 for value in leaf):
+            message = "The graph needs to have at least some leaves"
+            raise TypeError(message)
+        value, total = arithmetic.value, arithmetic.total
+        connections = [value(1 if v > 0 else 0) for v in leaf]
+        elaborate = list(leaf)
+        predecessors = self.predecessors
+        for i in self.topological_order():
+            citing = predecessors[i]
+            if citing:
+                connections[i] = total(connections[j] for j in citing)
+                elaborate[i] = total(elaborate[j] for j in citing)
+        return connections, elaborate
+
+    def trunk(
+        self,
+        root: list[int],
+        leaf: list[float],
+        sap: list[float],
+        limit: int | None,
+    ) -> list[float]:
+        """Return the trunk value of every node, its sap if it is in the trunk."""
+        candidates = [
+            (i, sap[i])
+            for i in range(len(self.nodes))
+            if root[i] == 0 and leaf[i] == 0 and sap[i] > 0
+        ]
+        if not candidates:
+            message = "The graph needs to have at least some nodes with sap"
+            raise TypeError(message)
+        trunk: list[float] = [0] * len(self.nodes)
+        for i, value in top(candidates, limit):
+            trunk[i] = value
+        return trunk
@@ -0,0 +1,129 @@
+"""Numbers used to count the paths between roots and leaves in the sap."""
+
+import math
+from collections.abc import Iterable
+from enum import Enum
+
+
+class SapNumeric(Enum):
+    """How to represent the path counts and sap of the nodes of a tree.
+
+    `EXACT` uses python integers, which grow without bound on deep graphs.
+    `FLOAT` uses floating point numbers, which stay fixed in size, and falls
+    back to `LOG` for the whole tree when a count overflows. `LOG` keeps
+    `log(1 + count)` instead of the count, so zero is still zero, counts
+    never overflow and their order is kept. Both approximations are exact
+    for counts up to `2**40`, beyond that counts too close to tell apart
+    may be ranked in either order. The numbers used for a tree are kept in
+    `graph.graph["numeric"]`.
+    """
+
+    EXACT = "exact"
+    FLOAT = "float"
+    LOG = "log"
+
+
+class Arithmetic:
+    """Operations needed by the sap on exact integers."""
+
+    @staticmethod
+    def value(number: int) -> float:
+        """Return the representation of a count."""
+        return number
+
+    @staticmethod
+    def total(values: Iterable[float]) -> float:
+        """Return the representation of the sum of some counts."""
+        return sum(values)
+
+    @staticmethod
+    def combine(a: float, b: float, c: float, d: float) -> float:
+        """Return the representation of `a * b + c * d`."""
+        return a * b + c * d
+
+
+def _finite(value: float) -> float:
+    if math.isinf(value):
+        message = "The path counts are too large for floating point numbers"
+        raise OverflowError(message)
+    return value
+
+
+class FloatArithmetic(Arithmetic):
+    """Operations needed by the sap on floating point numbers.
+
+    Every operation raises `OverflowError` instead of returning infinity,
+    which would tie with every other overflowed count.
+    """
+
+    @staticmethod
+    def value(number: int) -> float:
+        """Return the representation of a count."""
+        return float(number)
+
+    @staticmethod
+    def total(values: Iterable[float]) -> float:
+        """Return the representation of the sum of some counts."""
+        return _finite(sum(values))
+
+    @staticmethod
+    def combine(a: float, b: float, c: float, d: float) -> float:
+        """Return the representation of `a * b + c * d`."""
+        return _finite(a * b + c * d)
+
+
+# Counts up to this size are recovered exactly from their logarithm
+_EXACT_LOG = math.log1p(2**40)
+
+
+def _count(value: float) -> int:
+    """Return the count of a small `log(1 + count)`."""
+    return round(math.expm1(value))
+
+
+def _log(value: float) -> float:
+    """Return `log(count)` from `log(1 + count)`."""
+    if value == 0:
+        return -math.inf
+    # log(expm1(value)) without overflowing for large values
+    return value + math.log(-math.expm1(-value))
+
+
+class LogArithmetic(Arithmetic):
+    """Operations needed by the sap on `log(1 + count)`."""
+
+    @staticmethod
+    def value(number: int) -> float:
+        """Return the representation of a count."""
+        return math.log1p(number)
+
+    @staticmethod
+    def total(values: Iterable[float]) -> float:
+        """Return the representation of the sum of some counts."""
+        values = list(values)
+        largest = max(values)
+        # Small counts are added exactly, so equal counts stay tied
+        if largest <= _EXACT_LOG:
+            return math.log1p(sum(_count(value) for value in values))
+        # 1 + sum(exp(v) - 1) scaled down by the largest term to avoid overflow
+        scaled = math.fsum(math.exp(value - largest) for value in values)
+        return largest + math.log(scaled - (len(values) - 1) * math.exp(-largest))
+
+    @staticmethod
+    def combine(a: float, b: float, c: float, d: float) -> float:
+        """Return the representation of `a * b + c * d`."""
+        if max(a, b, c, d) <= _EXACT_LOG:
+            return math.log1p(_count(a) * _count(b) + _count(c) * _count(d))
+        first = _log(a) + _log(b)
+        second = _log(c) + _log(d)
+        largest = max(first, second, 0.0)
+        return largest + math.log(
+            math.exp(-largest) + math.exp(first - largest) + math.exp(second - largest)
+        )
+
+
+ARITHMETIC: dict[SapNumeric, type[Arithmetic]] = {
+    SapNumeric.EXACT: Arithmetic,
+    SapNumeric.FLOAT: FloatArithmetic,
+    SapNumeric.LOG: LogArithmetic,
+}
@@ -0,0 +1,60 @@
+"""Disjoint sets over integer elements."""
+
+from collections.abc import Iterator
+
+
+class UnionFind:
+    """Disjoint sets of the integers `0..n-1` with path compression and union by rank.
+
+    Elements are created with `add` and numbered in order, so callers can
+    intern any hashable value into an element and keep the mapping on their
+    side.
+    """
+
+    __slots__ = ("_parent", "_rank")
+
+    def __init__(self) -> None:
+        self._parent: list[int] = []
+        self._rank = bytearray()
+
+    def __len__(self) -> int:
+        """Return the number of elements."""
+        return len(self._parent)
+
+    def add(self) -> int:
+        """Add a new element in its own set and return it."""
+        element = len(self._parent)
+        self._parent.append(element)
+        self._rank.append(0)
+        return element
+
+    def find(self, element: int) -> int:
+        """Return the representative of the set of an element."""
+        parent = self._parent
+        root = element
+        while parent[root] != root:
+            root = parent[root]
+        # Point every element on the path straight to the root
+        while parent[element] != root:
+            parent[element], element = root, parent[element]
+        return root
+
+    def union(self, a: int, b: int) -> int:
+        """Join the sets of two elements and return the new representative."""
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return a
+        rank = self._rank
+        if rank[a] < rank[b]:
+            a, b = b, a
+        self._parent[b] = a
+        if rank[a] == rank[b]:
+            rank[a] += 1
+        return a
+
+    def roots(self) -> Iterator[int]:
+        """Yield the representative of every element, in element order."""
+        find = self.find
+        for element in range(len(self._parent)):
+            yield find(element)
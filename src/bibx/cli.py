@@ -7,6 +7,7 @@ import typer
 from rich import print as rprint
 
 from bibx import (
+    OpenAlexCache,
     query_openalex,
     read_any,
     read_scopus_bib,
@@ -86,8 +87,7 @@ def sap(filename: str) -> None:
         collection = read_any(f)
 
     s = Sap()
-    graph = s.create_graph(collection)
-    graph = s.clean_graph(graph)
+    graph = s.create_clean_graph(collection)
     graph = s.tree(graph)
     rprint(graph)
 
@@ -99,12 +99,19 @@ def openalex(
         help="how to handle references",
         default=EnrichReferences.BASIC,
     ),
+    cache: str | None = typer.Option(
+        help="sqlite file to keep the responses of the API in",
+        default=None,
+    ),
 ) -> None:
     """Run the sap algorithm on a seed file of any supported format."""
-    c = query_openalex(" ".join(query), enrich=enrich)
+    c = query_openalex(
+        " ".join(query),
+        enrich=enrich,
+        cache=OpenAlexCache(cache) if cache else None,
+    )
     s = Sap()
-    graph = s.create_graph(c)
-    graph = s.clean_graph(graph)
+    graph = s.create_clean_graph(c)
     graph = s.tree(graph)
     rprint(graph)
 
@@ -0,0 +1,211 @@
+"""Local cache for the responses of the openalex API."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+
+_DAY = 24 * 60 * 60
+
+_RESPONSE = "response"
+_WORK = "work"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    body TEXT,
+    stored REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals SELECT 0, COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET size = size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET size = size - old.size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET size = size - old.size;
+END;
+"""
+
+# Keep the number of variables of a query under the sqlite limit
+_MAX_KEYS_PER_QUERY = 500
+
+
+def work_key(openalex_id: str) -> str:
+    """Return the key of a work from its id or its url, like `W2741809807`."""
+    return openalex_id.rstrip("/").rsplit("/", 1)[-1].upper()
+
+
+def request_key(url: str, params: Mapping[str, str | int]) -> str:
+    """Return the key of a request, the same for the same parameters in any order."""
+    return json.dumps([url, sorted((str(k), str(v)) for k, v in params.items())])
+
+
+class OpenAlexCache:
+    """Cache of openalex responses in a sqlite database.
+
+    Whole responses are kept by their url and parameters, and single works by
+    their openalex id. A work can be kept as missing, when the API does not
+    return it because it is not an article, so it is not asked for again.
+
+    Entries expire `ttl` seconds after they are stored, `negative_ttl` for
+    missing works, and the least recently used ones are dropped when their
+    keys and bodies take more than `max_bytes`. The cache can be shared by the
+    threads of a client.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        *,
+        ttl: float | None = 7 * _DAY,
+        negative_ttl: float | None = _DAY,
+        max_bytes: int | None = 512 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Open a cache, creating its database if needed.
+
+        :param path: sqlite database file, in memory by default.
+        :param ttl: seconds a response or a work is valid, forever if `None`.
+        :param negative_ttl: seconds a missing work is valid, forever if `None`.
+        :param max_bytes: size of the entries to keep, unbounded if `None`.
+        :param clock: function returning the current time in seconds.
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones."""
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()
+        return count
+
+    @property
+    def size(self) -> int:
+        """Return the bytes taken by the keys and bodies of the entries."""
+        with self._lock:
+            (size,) = self._connection.execute("SELECT size FROM totals").fetchone()
+        return size
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM entries")
+
+    def get_response(self, url: str, params: Mapping[str, str | int]) -> str | None:
+        """Return the body of a cached response, if any."""
+        key = request_key(url, params)
+        return self._get(_RESPONSE, [key]).get(key)
+
+    def put_response(
+        self, url: str, params: Mapping[str, str | int], body: str
+    ) -> None:
+        """Keep the body of a response."""
+        self._put(_RESPONSE, {request_key(url, params): body})
+
+    def get_works(self, ids: Iterable[str]) -> dict[str, str | None]:
+        """Return the cached works among some ids, by key.
+
+        Works kept as missing are returned as `None` and unknown works are
+        left out.
+        """
+        return self._get(_WORK, list(dict.fromkeys(work_key(id_) for id_ in ids)))
+
+    def put_works(self, works: Mapping[str, str | None]) -> None:
+        """Keep works by id, `None` for the ones that are missing."""
+        self._put(_WORK, {work_key(id_): body for id_, body in works.items()})
+
+    def _expired(self, body: str | None, stored: float, now: float) -> bool:
+        ttl = self.ttl if body is not None else self.negative_ttl
+        return ttl is not None and now - stored > ttl
+
+    def _get(self, kind: str, keys: list[str]) -> dict[str, str | None]:
+        now = self._clock()
+        found: dict[str, str | None] = {}
+        expired: list[str] = []
+        with self._lock, self._connection:
+            for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+                batch = keys[start : start + _MAX_KEYS_PER_QUERY]
+                marks = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, body, stored FROM entries "  # noqa: S608
+                    f"WHERE kind = ? AND key IN ({marks})",
+                    [kind, *batch],
+                )
+                for key, body, stored in rows:
+                    if self._expired(body, stored, now):
+                        expired.append(key)
+                    else:
+                        found[key] = body
+            self._connection.executemany(
+                "DELETE FROM entries WHERE kind = ? AND key = ?",
+                [(kind, key) for key in expired],
+            )
+            self._connection.executemany(
+                "UPDATE entries SET accessed = ? WHERE kind = ? AND key = ?",
+                [(now, kind, key) for key in found],
+            )
+        return found
+
+    def _put(self, kind: str, entries: Mapping[str, str | None]) -> None:
+        now = self._clock()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                # An upsert, unlike a replace, runs the triggers of the total
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, key) DO UPDATE SET body = excluded.body, "
+                "stored = excluded.stored, accessed = excluded.accessed, "
+                "size = excluded.size",
+                [
+                    (kind, key, body, now, now, len(key) + len(body or ""))
+                    for key, body in entries.items()
+                ],
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries until they fit."""
+        if self.max_bytes is None:
+            return
+        # The total is kept up to date by triggers, so it isn't summed again
+        (total,) = self._connection.execute("SELECT size FROM totals").fetchone()
+        if total <= self.max_bytes:
+            return
+        dropped: list[tuple[str, str]] = []
+        rows = self._connection.execute(
+            "SELECT kind, key, size FROM entries ORDER BY accessed"
+        )
+        for kind, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            dropped.append((kind, key))
+            total -= size
+        rows.close()
+        self._connection.executemany(
+            "DELETE FROM entries WHERE kind = ? AND key = ?", dropped
+        )
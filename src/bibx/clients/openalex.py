@@ -1,10 +1,14 @@
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum
 
 import requests
 from pydantic import BaseModel, ValidationError
+from requests.adapters import HTTPAdapter
 
+from bibx.clients.cache import OpenAlexCache, work_key
+from bibx.clients.scheduler import RequestScheduler
 from bibx.exceptions import OpenAlexError
 from bibx.utils import chunks
 
@@ -12,7 +16,6 @@ logger = logging.getLogger(__name__)
 
 _MAX_WORKS_PER_PAGE = 200
 _MAX_IDS_PER_REQUEST = 80
-_MAX_CONNECTIONS = 5
 
 
 class AuthorPosition(Enum):
@@ -93,8 +96,9 @@ class ResponseMeta(BaseModel):
     """Metadata from the openalex API response."""
 
     count: int
-    page: int
+    page: int | None = None
     per_page: int
+    next_cursor: str | None = None
 
 
 class WorkResponse(BaseModel):
@@ -107,13 +111,34 @@ class WorkResponse(BaseModel):
 class OpenAlexClient:
     """Client for the openalex API."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         base_url: str | None = None,
         email: str | None = None,
+        cache: OpenAlexCache | None = None,
+        *,
+        scheduler: RequestScheduler | None = None,
+        pool_connections: int = 10,
+        pool_maxsize: int | None = None,
     ) -> None:
+        """Create a client.
+
+        :param cache: keep the responses of the API to reuse them.
+        :param scheduler: pace and retry the requests, 10 per second by default.
+        :param pool_connections: hosts to keep a pool of connections for.
+        :param pool_maxsize: connections kept per host, as many as the most
+            requests in flight allowed by the scheduler by default.
+        """
         self.base_url = base_url or "https://api.openalex.org"
+        self.cache = cache
+        self.scheduler = scheduler or RequestScheduler()
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize or self.scheduler.max_concurrency,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.email = email or "technology@coreofscience.org"
         self.session.headers.update(
             {
@@ -123,21 +148,33 @@ class OpenAlexClient:
             }
         )
 
-    def _fetch_works(self, params: dict[str, str | int]) -> WorkResponse:
-        response = self.session.get(
-            f"{self.base_url}/works",
-            params=params,
-        )
+    def _fetch_works(
+        self,
+        params: dict[str, str | int],
+        *,
+        cached: bool = True,
+    ) -> WorkResponse:
+        url = f"{self.base_url}/works"
+        if cached and self.cache is not None:
+            body = self.cache.get_response(url, params)
+            if body is not None:
+                try:
+                    return WorkResponse.model_validate_json(body)
+                except ValidationError:
+                    logger.warning("ignoring an invalid cached response")
         try:
+            response = self.scheduler.send(lambda: self.session.get(url, params=params))
             response.raise_for_status()
             data = response.json()
-            return WorkResponse.model_validate(data)
+            work_response = WorkResponse.model_validate(data)
         except (requests.RequestException, ValidationError) as error:
             raise OpenAlexError(str(error)) from error
+        if cached and self.cache is not None:
+            self.cache.put_response(url, params, response.text)
+        return work_response
 
-    def list_recent_articles(self, query: str, limit: int = 600) -> list[Work]:
-        """List recent articles from the openalex API."""
-        select = ",".join(Work.model_fields.keys())
+    @staticmethod
+    def _recent_params(query: str) -> dict[str, str | int]:
         filter_ = ",".join(
             [
                 f"title_and_abstract.search:{query.replace(' ', '+')}",
@@ -145,52 +182,106 @@ class OpenAlexClient:
                 "cited_by_count:>1",
             ]
         )
-        pages = (limit // _MAX_WORKS_PER_PAGE) + 1
-        results: list[Work] = []
-        with ThreadPoolExecutor(max_workers=min(pages, _MAX_CONNECTIONS)) as executor:
-            futures = [
-                executor.submit(
-                    self._fetch_works,
-                    {
-                        "select": select,
-                        "filter": filter_,
-                        "sort": "publication_year:desc",
-                        "per_page": _MAX_WORKS_PER_PAGE,
-                        "page": page,
-                    },
-                )
-                for page in range(1, pages + 1)
-            ]
-            wait(futures)
-            for future in futures:
-                work_response = future.result()
-                results.extend(work_response.results)
-                if len(results) >= limit:
-                    break
-        return results[:limit]
+        return {
+            "select": ",".join(Work.model_fields.keys()),
+            "filter": filter_,
+            "sort": "publication_year:desc",
+        }
+
+    def iter_recent_articles(self, query: str, limit: int = 600) -> Iterator[Work]:
+        """Yield recent articles from the openalex API as their pages arrive.
+
+        Pages are followed with the cursor of the API, which has no limit on
+        the number of results, and no page is requested past `limit`. The
+        pages are not cached, since the cursors they hold may not be valid
+        anymore by the time the pages after them are requested.
+        """
+        params = self._recent_params(query)
+        cursor: str | None = "*"
+        remaining = limit
+        while remaining > 0 and cursor is not None:
+            per_page = min(remaining, _MAX_WORKS_PER_PAGE)
+            work_response = self._fetch_works(
+                {**params, "per_page": per_page, "cursor": cursor}, cached=False
+            )
+            yield from work_response.results[:remaining]
+            remaining -= len(work_response.results)
+            if len(work_response.results) < per_page:
+                break
+            cursor = work_response.meta.next_cursor
+
+    def list_recent_articles(self, query: str, limit: int = 600) -> list[Work]:
+        """List recent articles from the openalex API."""
+        return list(self.iter_recent_articles(query, limit))
 
     def list_articles_by_openalex_id(self, ids: list[str]) -> list[Work]:
-        """List articles by openalex id."""
+        """List articles by openalex id.
+
+        With a cache, only the works it doesn't know are requested, and the
+        ones the API doesn't return are kept as missing.
+        """
         if not ids:
             return []
-        select = ",".join(Work.model_fields.keys())
         results: list[Work] = []
-        with ThreadPoolExecutor(max_workers=_MAX_CONNECTIONS) as executor:
+        if self.cache is not None:
+            known = self.cache.get_works(ids)
+            # A merged work is kept under its old id too, but listed once
+            results.extend(
+                Work.model_validate_json(body)
+                for body in dict.fromkeys(known.values())
+                if body is not None
+            )
+            ids = [id_ for id_ in ids if work_key(id_) not in known]
+            logger.info("got %s works from the cache", len(results))
+        with ThreadPoolExecutor(max_workers=self.scheduler.max_concurrency) as executor:
             futures = [
-                executor.submit(
-                    self._fetch_works,
-                    {
-                        "select": select,
-                        "filter": f"ids.openalex:{'|'.join(ids)},type:types/article",
-                        "per_page": _MAX_IDS_PER_REQUEST,
-                    },
-                )
-                for ids in chunks(ids, _MAX_IDS_PER_REQUEST)
+                executor.submit(self._fetch_works_by_id, chunk)
+                for chunk in chunks(ids, _MAX_IDS_PER_REQUEST)
             ]
             for future in as_completed(futures):
-                work_response = future.result()
-                logger.info(
-                    "got %s works from the openalex api", len(work_response.results)
-                )
-                results.extend(work_response.results)
+                works = future.result()
+                logger.info("got %s works from the openalex api", len(works))
+                results.extend(works)
         return results
+
+    def _fetch_works_by_id(self, ids: list[str]) -> list[Work]:
+        """Request the works with some ids, keeping them in the cache if any."""
+        select = ",".join(Work.model_fields.keys())
+        works = self._fetch_works(
+            {
+                "select": select,
+                "filter": f"ids.openalex:{'|'.join(ids)},type:types/article",
+                "per_page": _MAX_IDS_PER_REQUEST,
+            },
+            cached=False,
+        ).results
+        if self.cache is not None:
+            self._cache_works(self.cache, ids, works)
+        return works
+
+    def _cache_works(
+        self, cache: OpenAlexCache, ids: list[str], works: list[Work]
+    ) -> None:
+        """Keep the works returned for some ids, and the missing ones.
+
+        A work merged into another one comes back with the id of the other
+        one, so the ids without a work of their own are requested again, in
+        halves if needed, until each is known to be missing or to be one of
+        the works returned.
+        """
+        found: dict[str, str | None] = {
+            work_key(work.id): work.model_dump_json() for work in works
+        }
+        unknown = [id_ for id_ in ids if work_key(id_) not in found]
+        if unknown and works:
+            if len(ids) == 1:
+                found[work_key(ids[0])] = works[0].model_dump_json()
+            elif len(unknown) < len(ids):
+                self._fetch_works_by_id(unknown)
+            else:
+                half = len(unknown) // 2
+                self._fetch_works_by_id(unknown[:half])
+                self._fetch_works_by_id(unknown[half:])
+        else:
+            found.update(dict.fromkeys(map(work_key, unknown), None))
+        cache.put_works(found)
@@ -0,0 +1,189 @@
+"""Pace, retry and limit the concurrency of the requests to an API."""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Too many requests, and server errors that usually go away on their own
+RETRY_STATUSES = frozenset(
+    {
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
+
+def retry_after(response: requests.Response, now: float) -> float | None:
+    """Return the seconds to wait that a response asks for, if any.
+
+    `Retry-After` holds either a number of seconds or an http date.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now, 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Let through `rate` calls per second on average, `burst` at once."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def acquire(self) -> None:
+        """Take a token, waiting for it if there are none left."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # The token is taken right away, so callers waiting at the same
+            # time are spaced out instead of racing for the next one
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+
+
+class RequestScheduler:
+    """Send requests with rate limiting, retries and adaptive concurrency.
+
+    Requests wait for a token of a `TokenBucket` before going out. The ones
+    throttled or failed with a transient error are retried after the time the
+    server asks for in `Retry-After`, or after an exponential backoff with
+    full jitter. The number of requests in flight grows by one every time as
+    many requests as are allowed succeed, and is halved when one is
+    throttled, between `min_concurrency` and `max_concurrency`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        rate: float | None = 10,
+        burst: int = 10,
+        *,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 60,
+        min_concurrency: int = 1,
+        max_concurrency: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[float, float], float] = random.uniform,
+    ) -> None:
+        """Create a scheduler.
+
+        :param rate: requests per second, unlimited if `None`.
+        :param burst: requests that can go out at once after a pause.
+        :param max_retries: times a request is retried before giving up.
+        :param backoff: seconds to wait before the first retry, at most.
+        :param max_backoff: longest wait between retries.
+        :param min_concurrency: requests in flight allowed when throttled.
+        :param max_concurrency: requests in flight allowed at most.
+        :param clock: function returning the current time in seconds.
+        :param sleep: function waiting some seconds.
+        :param jitter: function returning a random number between two others.
+        """
+        self.bucket = (
+            TokenBucket(rate, burst, clock=clock, sleep=sleep) if rate else None
+        )
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self._sleep = sleep
+        self._jitter = jitter
+        self._condition = threading.Condition()
+        self._limit = float(max_concurrency)
+        self._active = 0
+
+    @property
+    def concurrency(self) -> int:
+        """Return the number of requests in flight allowed right now."""
+        with self._condition:
+            return int(self._limit)
+
+    def send(self, request: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request until it succeeds or runs out of retries.
+
+        The last response is returned even if it failed, the last connection
+        error is raised, and any other error is raised right away.
+        """
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            self._enter()
+            response: requests.Response | None = None
+            throttled = False
+            failed = True
+            try:
+                response = request()
+                failed = response.status_code in RETRY_STATUSES
+                throttled = response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            finally:
+                # Any other error goes up to the caller, but the slot is freed
+                self._leave(throttled=throttled, failed=failed)
+            if response is not None and (not failed or attempt >= self.max_retries):
+                return response
+            delay = self._delay(attempt, response)
+            logger.debug("retrying a request in %.2fs", delay)
+            self._sleep(delay)
+            attempt += 1
+
+    def _delay(self, attempt: int, response: requests.Response | None) -> float:
+        if response is not None:
+            delay = retry_after(response, time.time())
+            if delay is not None:
+                return delay
+        return self._jitter(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def _enter(self) -> None:
+        with self._condition:
+            while self._active >= int(self._limit):
+                self._condition.wait()
+            self._active += 1
+
+    def _leave(self, *, throttled: bool, failed: bool) -> None:
+        with self._condition:
+            self._active -= 1
+            if throttled:
+                self._limit = max(self.min_concurrency, self._limit / 2)
+            elif not failed:
+                self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+            self._condition.notify_all()
@@ -6,15 +6,25 @@ class InvalidIsiLineError(BibXError, ValueError):
     """Raised when we encounter an invalid line when processing an ISI file."""
 
     def __init__(self, line: str) -> None:
+        self.line = line
         super().__init__(f"'{line}' is not a valid ISI file line")
 
+    def __reduce__(self) -> tuple[type, tuple[str]]:
+        """Pickle with the original line so it survives worker processes."""
+        return type(self), (self.line,)
+
 
 class InvalidIsiReferenceError(BibXError, ValueError):
     """Raised when we try to create an article out of an invalid ISI reference."""
 
     def __init__(self, reference: str) -> None:
+        self.reference = reference
         super().__init__(f"{reference} does not look like an ISI citation")
 
+    def __reduce__(self) -> tuple[type, tuple[str]]:
+        """Pickle with the original reference so it survives worker processes."""
+        return type(self), (self.reference,)
+
 
 class MissingCriticalInformationError(BibXError, ValueError):
     """Raised when we don't have the publication year of an article."""
@@ -22,6 +32,10 @@ class MissingCriticalInformationError(BibXError, ValueError):
     def __init__(self) -> None:
         super().__init__("Article is missing some critical information")
 
+    def __reduce__(self) -> tuple[type, tuple[()]]:
+        """Pickle without arguments so it survives worker processes."""
+        return type(self), ()
+
 
 class InvalidScopusFileError(BibXError, ValueError):
     """Raised when we find an invalid line on an scopus RIS file."""
@@ -29,6 +43,10 @@ class InvalidScopusFileError(BibXError, ValueError):
     def __init__(self) -> None:
         super().__init__("The file contains an invalid RIS line")
 
+    def __reduce__(self) -> tuple[type, tuple[()]]:
+        """Pickle without arguments so it survives worker processes."""
+        return type(self), ()
+
 
 class OpenAlexError(BibXError):
     """Raised when we encounter an error with the OpenAlex API."""
@@ -1,21 +1,135 @@
-from collections.abc import Mapping
-from dataclasses import dataclass, field
-from typing import TypeVar
+from collections.abc import Iterable, Mapping
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass, field, fields
+from typing import Any, Self
 
-T = TypeVar("T")
+from bibx.provenance import SourceSpan
 
+# Fields where a merge keeps the first value that is not None
+_FIRST_SET = (
+    "year",
+    "title",
+    "journal",
+    "volume",
+    "issue",
+    "page",
+    "doi",
+    "_permalink",
+    "times_cited",
+)
+# Fields where a merge keeps the first value that is not empty
+_FIRST_FILLED = ("authors", "references", "keywords")
 
-def _keep(a: T, b: T) -> T:
-    return a if a is not None else b
 
+class IdSet(set[str]):
+    """Set of ids that remembers its smallest id.
 
-def _keep_longest(a: str, b: str) -> str:
-    return a if len(a) > len(b) else b
+    The smallest id is the key of an article. It is computed once and kept
+    until the set changes, adding an id updates it in place and any other
+    change forgets it.
+    """
 
+    __slots__ = ("_key",)
 
-@dataclass
+    def __init__(self, ids: Iterable[str] = ()) -> None:
+        super().__init__(ids)
+        self._key: str | None = None
+
+    @property
+    def key(self) -> str:
+        """Return the smallest id, it fails if the set is empty."""
+        if self._key is None:
+            self._key = min(self)
+        return self._key
+
+    def add(self, id_: str) -> None:
+        """Add an id, keeping the smallest one up to date."""
+        super().add(id_)
+        if self._key is not None and id_ < self._key:
+            self._key = id_
+
+    def _forget(self) -> None:
+        self._key = None
+
+    def update(self, *others: Iterable[str]) -> None:
+        """Add the ids from other iterables."""
+        super().update(*others)
+        self._forget()
+
+    def discard(self, id_: str) -> None:
+        """Remove an id if present."""
+        super().discard(id_)
+        self._forget()
+
+    def remove(self, id_: str) -> None:
+        """Remove an id, it must be present."""
+        super().remove(id_)
+        self._forget()
+
+    def pop(self) -> str:
+        """Remove and return an arbitrary id."""
+        self._forget()
+        return super().pop()
+
+    def clear(self) -> None:
+        """Remove every id."""
+        super().clear()
+        self._forget()
+
+    def difference_update(self, *others: Iterable[Any]) -> None:
+        """Remove the ids found in other iterables."""
+        super().difference_update(*others)
+        self._forget()
+
+    def intersection_update(self, *others: Iterable[Any]) -> None:
+        """Keep only the ids found in every other iterable."""
+        super().intersection_update(*others)
+        self._forget()
+
+    def symmetric_difference_update(self, other: Iterable[str]) -> None:
+        """Keep the ids found in either set but not in both."""
+        super().symmetric_difference_update(other)
+        self._forget()
+
+    def __ior__(self, other: AbstractSet[str]) -> Self:  # type: ignore[override,misc]
+        """Add the ids from another set."""
+        self.update(other)
+        return self
+
+    def __iand__(self, other: AbstractSet[object]) -> Self:
+        """Keep only the ids found in another set."""
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other: AbstractSet[object]) -> Self:
+        """Remove the ids found in another set."""
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other: AbstractSet[str]) -> Self:  # type: ignore[override,misc]
+        """Keep the ids found in either set but not in both."""
+        self.symmetric_difference_update(other)
+        return self
+
+    def __reduce__(self) -> tuple[type["IdSet"], tuple[list[str]]]:
+        """Pickle and copy the ids without the cached key."""
+        return type(self), (list(self),)
+
+    def __repr__(self) -> str:
+        """Return the same representation as a plain set."""
+        return set.__repr__(set(self))
+
+
+@dataclass(slots=True)
 class Article:
-    """A scientific article."""
+    """A scientific article.
+
+    Articles don't have a `__dict__`, so bare references stay small.
+
+    The ids are used as given, so the article shares them with the caller.
+    The sources pass an `IdSet`, so the key is only computed again after the
+    ids change, and it is computed on every read for a plain set.
+    """
 
     label: str
     ids: set[str]
@@ -31,34 +145,63 @@ class Article:
     times_cited: int | None = None
     references: list["Article"] = field(default_factory=list)
     keywords: list[str] = field(default_factory=list)
-    sources: set[str] = field(default_factory=set)
+    sources: set[str | SourceSpan] = field(default_factory=set)
     extra: Mapping = field(default_factory=dict)
 
     def merge(self, other: "Article") -> "Article":
         """Merge two articles into a new one."""
-        return Article(
-            label=_keep_longest(self.label, other.label),
-            ids=self.ids.union(other.ids),
-            authors=self.authors if self.authors else other.authors,
-            year=_keep(self.year, other.year),
-            title=_keep(self.title, other.title),
-            journal=_keep(self.journal, other.journal),
-            volume=_keep(self.volume, other.volume),
-            issue=_keep(self.issue, other.issue),
-            page=_keep(self.page, other.page),
-            doi=_keep(self.doi, other.doi),
-            _permalink=_keep(self._permalink, other._permalink),
-            times_cited=_keep(self.times_cited, other.times_cited),
-            references=self.references or other.references,
-            keywords=self.keywords or other.keywords,
-            sources=self.sources.union(other.sources),
-            extra={**self.extra, **other.extra},
-        )
+        return Article.merge_many((self, other))
+
+    @classmethod
+    def merge_many(cls, articles: Iterable["Article"]) -> "Article":
+        """Merge any number of articles into a new one in a single pass.
+
+        The result is the same as merging them two at a time in order: the
+        longest label wins, ties going to the later one, the other fields
+        keep the first value that is set, ids and sources are joined and
+        `extra` is updated in order.
+
+        :param articles: at least one article.
+        :return: a new article.
+        """
+        iterator = iter(articles)
+        first = next(iterator, None)
+        if first is None:
+            message = "At least one article is needed to merge"
+            raise ValueError(message)
+        label = first.label
+        ids = IdSet(first.ids)
+        sources = set(first.sources)
+        extra = dict(first.extra.items())
+        kept = {name: getattr(first, name) for name in (*_FIRST_SET, *_FIRST_FILLED)}
+        unset = [name for name in _FIRST_SET if kept[name] is None]
+        empty = [name for name in _FIRST_FILLED if not kept[name]]
+        for article in iterator:
+            if len(article.label) >= len(label):
+                label = article.label
+            ids.update(article.ids)
+            sources.update(article.sources)
+            # Lazy mappings can hand out their items faster than key by key
+            extra.update(article.extra.items())
+            # Only the fields still missing are looked at
+            if unset:
+                found = [name for name in unset if getattr(article, name) is not None]
+                if found:
+                    kept.update((name, getattr(article, name)) for name in found)
+                    unset = [name for name in unset if kept[name] is None]
+            if empty:
+                found = [name for name in empty if getattr(article, name)]
+                if found:
+                    kept.update((name, getattr(article, name)) for name in found)
+                    empty = [name for name in empty if not kept[name]]
+        return cls(label=label, ids=ids, sources=sources, extra=extra, **kept)
 
     @property
     def key(self) -> str:
         """Return the first ID of the article."""
-        return next(iter(sorted(self.ids)))
+        ids = self.ids
+        # A plain set has no key to remember
+        return ids.key if type(ids) is IdSet else min(ids)
 
     @property
     def simple_label(self) -> str | None:
@@ -92,6 +235,10 @@ class Article:
         author = self.authors[0].split(" ")[0].replace(",", "")
         return f"{author}{self.year}".lower()
 
+    def __reduce__(self) -> tuple[type["Article"], tuple]:
+        """Pickle the article as a tuple of values to send it between processes."""
+        return type(self), tuple(getattr(self, f.name) for f in fields(self))
+
     def __repr__(self) -> str:
         """Return a string representation of the article."""
         return f"Article(ids={self.ids!r}, authors={self.authors!r})"
@@ -127,5 +274,5 @@ class Article:
             "doi": self.doi,
             "times_cited": self.times_cited,
             "keywords": self.keywords,
-            "sources": list(self.sources),
+            "sources": [str(source) for source in self.sources],
         }
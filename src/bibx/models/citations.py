@@ -0,0 +1,94 @@
+"""Citations between the articles of a collection, in both directions."""
+
+from collections.abc import Iterator
+
+from .article import Article
+
+
+def articles_by_key(articles: list[Article]) -> dict[str, Article]:
+    """Return the article of every key in a list and its references.
+
+    The keys are in the order they are first seen. Articles of the list win
+    over references sharing their key, and the ones without ids are left
+    out like in the citations.
+    """
+    found: dict[str, Article] = {}
+    for article in articles:
+        for reference in article.references:
+            if reference.ids:
+                found[reference.key] = reference
+    for article in articles:
+        if article.ids:
+            found[article.key] = article
+    return found
+
+
+class CitationIndex:
+    """Forward and reverse adjacency of the citations in a list of articles.
+
+    Articles are identified by their key, like in the graphs built from a
+    collection, so repeated citations and articles sharing a key count once
+    and self citations are left out. Only articles taking part in a citation
+    are known, any other has no references and no citations.
+    """
+
+    __slots__ = ("_articles", "_cited_by", "_cites", "_edges", "_nodes", "_size")
+
+    def __init__(self, articles: list[Article]) -> None:
+        self._articles = articles
+        self._size = len(articles)
+        # Keys and edges are kept in order of appearance in the citation pairs
+        self._nodes: dict[str, Article] = {}
+        self._edges: list[tuple[str, str]] = []
+        self._cites: dict[str, dict[str, None]] = {}
+        self._cited_by: dict[str, dict[str, None]] = {}
+        for article in articles:
+            if not article.ids:
+                continue
+            source = article.key
+            for reference in article.references:
+                if not reference.ids:
+                    continue
+                target = reference.key
+                self._nodes.setdefault(source, article)
+                self._nodes.setdefault(target, reference)
+                cites = self._cites.setdefault(source, {})
+                if source == target or target in cites:
+                    continue
+                cites[target] = None
+                self._cited_by.setdefault(target, {})[source] = None
+                self._edges.append((source, target))
+
+    def covers(self, articles: list[Article]) -> bool:
+        """Tell if the index is up to date with a list of articles."""
+        return self._articles is articles and len(articles) == self._size
+
+    def __len__(self) -> int:
+        """Return the number of articles taking part in a citation."""
+        return len(self._nodes)
+
+    def keys(self) -> Iterator[str]:
+        """Yield the keys of the articles in order of appearance."""
+        return iter(self._nodes)
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        """Yield the key of every citing article with the key of the cited one."""
+        return iter(self._edges)
+
+    def references(self, article: Article) -> Iterator[Article]:
+        """Yield the articles cited by an article."""
+        for key in self._cites.get(article.key, ()):
+            yield self._nodes[key]
+
+    def cited_by(self, article: Article) -> Iterator[Article]:
+        """Yield the articles citing an article."""
+        for key in self._cited_by.get(article.key, ()):
+            yield self._nodes[key]
+
+    def out_degree(self, article: Article) -> int:
+        """Return the number of articles cited by an article."""
+        return len(self._cites.get(article.key, ()))
+
+    def in_degree(self, article: Article) -> int:
+        """Return the number of articles citing an article."""
+        return len(self._cited_by.get(article.key, ()))
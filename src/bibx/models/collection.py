@@ -1,13 +1,16 @@
 import datetime
 import logging
-from collections import defaultdict
+from collections import Counter
 from collections.abc import Iterable
-from dataclasses import dataclass
-from functools import reduce
+from dataclasses import dataclass, field
 
-import networkx as nx
+from bibx.algorithms.union_find import UnionFind
 
 from .article import Article
+from .citations import CitationIndex
+from .deduplication import DeduplicationIndex
+from .graph import CitationGraph
+from .lookup import LookupIndex
 
 logger = logging.getLogger(__name__)
 
@@ -17,24 +20,133 @@ class Collection:
     """A collection of scientific articles."""
 
     articles: list[Article]
+    _index: DeduplicationIndex | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _lookup: LookupIndex | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _citations: CitationIndex | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Bumped by every change to the articles made or reported through the
+    # collection, the deduplication index is only used at its own version
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+
+    def _deduplication_index(self) -> DeduplicationIndex | None:
+        index = self._index
+        if index is None or not index.covers(self.articles, self._version):
+            index = self._index = DeduplicationIndex.build(self.articles, self._version)
+        return index
 
     def merge(self, other: "Collection") -> "Collection":
         """Create a new collection merging the articles by key.
 
+        The articles of this collection are indexed the first time, after
+        that only the articles of the other collection and the ones they
+        duplicate are looked at. The index moves to the new collection, so
+        merging its result again is just as cheap. The articles of both
+        collections are left as they are, the ones whose references change
+        are copied.
+
         :param other: collection to merge to.
         :return: a new collection object.
         """
-        all_articles = self.articles + other.articles
-        return Collection(self.deduplicate_articles(all_articles))
+        index = self._deduplication_index()
+        if index is None:
+            all_articles = self.articles + other.articles
+            return Collection(self.deduplicate_articles(all_articles))
+        self._index = None
+        merged = Collection(index.add(other.articles, version=0))
+        merged._index = index
+        return merged
+
+    def extend(self, articles: Iterable[Article]) -> None:
+        """Add articles to the collection, merging them by key.
+
+        This is the same as merging a collection with the articles, but the
+        list of articles of this collection is changed in place.
+
+        :param articles: the articles to add.
+        """
+        self._lookup = None
+        self._citations = None
+        index = self._deduplication_index()
+        self._version += 1
+        if index is None:
+            self.articles = self.deduplicate_articles([*self.articles, *articles])
+            return
+        index.add(articles, in_place=True, version=self._version)
+
+    def _lookup_index(self) -> LookupIndex:
+        lookup = self._lookup
+        if lookup is None or not lookup.covers(self.articles):
+            lookup = self._lookup = LookupIndex(self.articles)
+        return lookup
+
+    def invalidate_indexes(self) -> None:
+        """Drop the indexes of the collection after changing it in place.
+
+        Adding or removing articles from the list, replacing it or calling
+        `extend` is noticed by the indexes, changing the articles themselves
+        or replacing items of the list needs this for the lookup and citation
+        indexes. The deduplication index notices those changes on its own.
+        """
+        self._lookup = None
+        self._citations = None
+        # The deduplication index sees the new version and is built again
+        self._version += 1
+
+    def get_article(self, id_: str) -> Article | None:
+        """Return the article with an id, like `doi:10.1000/1` or `wos:1`."""
+        return self._lookup_index().by_id(id_)
+
+    def articles_with_doi(self, doi: str) -> list[Article]:
+        """Return the articles with a DOI.
+
+        DOIs are compared ignoring their case and a `https://doi.org/` or
+        `doi:` prefix.
+        """
+        return self._lookup_index().by_doi(doi)
+
+    def articles_by_first_author(self, author: str) -> list[Article]:
+        """Return the articles with a first author, ignoring case and spacing."""
+        return self._lookup_index().by_first_author(author)
+
+    def articles_in_journal(self, journal: str) -> list[Article]:
+        """Return the articles of a journal, ignoring case and spacing."""
+        return self._lookup_index().by_journal(journal)
+
+    def articles_in_years(
+        self,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> list[Article]:
+        """Return the articles published between two years, both included.
+
+        :param start: first year, unbounded if not given.
+        :param end: last year, unbounded if not given.
+        :return: the articles sorted by year.
+        """
+        return self._lookup_index().by_years(start, end)
 
     @staticmethod
-    def _all_articles(articles: list[Article]) -> Iterable[Article]:
+    def _all_articles(
+        articles: Iterable[Article],
+        roots: list[Article] | None = None,
+    ) -> Iterable[Article]:
         seen = set()
+        expanded = set()
         for article in articles:
-            if id(article) in seen:
+            if roots is not None:
+                roots.append(article)
+            if id(article) not in seen:
+                yield article
+                seen.add(id(article))
+            # An article cited before it shows up still needs its references
+            if id(article) in expanded:
                 continue
-            yield article
-            seen.add(id(article))
+            expanded.add(id(article))
             for reference in article.references:
                 if id(reference) in seen:
                     continue
@@ -42,55 +154,91 @@ class Collection:
                 seen.add(id(reference))
 
     @classmethod
-    def _uniqe_articles_by_id(cls, articles: list[Article]) -> dict[str, Article]:
-        graph = nx.Graph()
-        id_to_article: defaultdict[str, list[Article]] = defaultdict(list)
-        for article in cls._all_articles(articles):
+    def _group_duplicates(
+        cls,
+        articles: Iterable[Article],
+        roots: list[Article] | None = None,
+    ) -> tuple[list[list[Article]], dict[str, int]]:
+        """Group the articles that share ids, directly or through others.
+
+        Every id is interned into a union-find element and the ids of each
+        article are joined, the sets left are the groups of duplicates.
+
+        :return: the groups with their articles in order of appearance and
+                 the index of the group of every id.
+        """
+        sets = UnionFind()
+        element_by_id: dict[str, int] = {}
+        firsts: list[tuple[Article, int]] = []
+        for article in cls._all_articles(articles, roots):
             if not article.ids:
                 continue
-            first, *rest = article.ids
-            # Add a loop edge so that the unique articles are included
-            graph.add_edge(first, first)
-            id_to_article[first].append(article)
-            for id_ in rest:
-                graph.add_edge(first, id_)
-                id_to_article[id_].append(article)
-        components = list(nx.connected_components(graph))
-        biggest = max(components, key=len)
-        smallest = min(components, key=len)
+            first = -1
+            for id_ in article.ids:
+                element = element_by_id.get(id_)
+                if element is None:
+                    element = element_by_id[id_] = sets.add()
+                if first < 0:
+                    first = element
+                else:
+                    sets.union(first, element)
+            firsts.append((article, first))
+
+        roots_by_element = list(sets.roots())
+        sizes = Counter(roots_by_element)
         logger.info(
             "Found %d components, biggest has %d articles, smallest has %d",
-            len(components),
-            len(biggest),
-            len(smallest),
+            len(sizes),
+            max(sizes.values()),
+            min(sizes.values()),
         )
 
-        article_by_id: dict[str, Article] = {}
-        for ids in components:
-            visited = set()
-            articles = []
-            for id_ in ids:
-                for article in id_to_article[id_]:
-                    if id(article) in visited:
-                        continue
-                    articles.append(article)
-                    visited.add(id(article))
-            merged = reduce(Article.merge, articles)
-            article_by_id.update(dict.fromkeys(ids, merged))
-
-        return article_by_id
+        groups: list[list[Article]] = []
+        group_by_root: dict[int, int] = {}
+        for article, first in firsts:
+            root = roots_by_element[first]
+            index = group_by_root.get(root)
+            if index is None:
+                index = group_by_root[root] = len(groups)
+                groups.append([])
+            groups[index].append(article)
+        group_by_id = {
+            id_: group_by_root[roots_by_element[element]]
+            for id_, element in element_by_id.items()
+        }
+        return groups, group_by_id
+
+    @classmethod
+    def _uniqe_articles_by_id(
+        cls,
+        articles: Iterable[Article],
+        roots: list[Article] | None = None,
+    ) -> dict[str, Article]:
+        groups, group_by_id = cls._group_duplicates(articles, roots)
+        # Merge in order of appearance so the result doesn't depend on the
+        # iteration order of the sets of ids
+        merged = [
+            group[0] if len(group) == 1 else Article.merge_many(group)
+            for group in groups
+        ]
+        return {id_: merged[index] for id_, index in group_by_id.items()}
 
     @classmethod
     def deduplicate_articles(
         cls,
-        articles: list[Article],
+        articles: Iterable[Article],
     ) -> list[Article]:
-        """Deduplicate a list of articles."""
-        article_by_id = cls._uniqe_articles_by_id(articles)
+        """Deduplicate a list of articles.
+
+        The articles are consumed in a single pass, so this can be fed
+        directly from a generator such as `Source.iter_articles`.
+        """
+        roots: list[Article] = []
+        article_by_id = cls._uniqe_articles_by_id(articles, roots)
 
         unique_articles: list[Article] = []
         seen = set()
-        for article in articles:
+        for article in roots:
             if not article.ids:
                 continue
             id_ = next(iter(article.ids))
@@ -111,6 +259,27 @@ class Collection:
 
         return unique_articles
 
+    @property
+    def citations(self) -> CitationIndex:
+        """Return the citations between the articles in both directions.
+
+        The index is built on first use and kept like the lookup indexes,
+        it gives the citing and cited articles of any article and their
+        number without walking the collection.
+        """
+        citations = self._citations
+        if citations is None or not citations.covers(self.articles):
+            citations = self._citations = CitationIndex(self.articles)
+        return citations
+
+    def to_csr(self) -> CitationGraph:
+        """Return the citation graph with integer nodes in flat arrays.
+
+        It has the nodes and edges of `Sap.create_graph` in a few bytes per
+        edge, for algorithms that don't need the attributes of the nodes.
+        """
+        return CitationGraph.from_collection(self)
+
     @property
     def citation_pairs(self) -> Iterable[tuple[Article, Article]]:
         """Return a generator with all citation pairs."""
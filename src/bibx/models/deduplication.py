@@ -0,0 +1,461 @@
+"""Index to add articles to a deduplicated list without starting over."""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import replace
+
+from bibx.algorithms.union_find import UnionFind
+
+from .article import Article, IdSet
+
+
+def _distinct(articles: Iterable[Article]) -> dict[int, Article]:
+    return {id(article): article for article in articles}
+
+
+def _copy(article: Article) -> Article:
+    return replace(article, ids=IdSet(article.ids))
+
+
+class DeduplicationIndex:
+    """Index of a deduplicated list of articles.
+
+    It knows which article owns every id and which articles of the list
+    cite every reference, so new articles are deduplicated against the list
+    looking only at them and at the groups they join. The result is the same
+    as deduplicating the whole list again with the new articles at the end,
+    like `Collection.merge` always did.
+
+    Only lists where no two articles or references share an id and every
+    reference has ids can be indexed, like the ones returned by
+    `Collection.deduplicate_articles`, `build` returns `None` for anything
+    else. The index is tied to a version of the list, the owner of the list
+    bumps it when it knows the articles changed. It also keeps the ids and
+    references it saw, so articles changed or replaced in place without
+    telling the owner are noticed too and the index is built again.
+
+    The articles given are never changed, the ones whose references have to
+    point to a merged article are copied first, along with the articles of
+    the list citing them.
+    """
+
+    __slots__ = (
+        "_articles",
+        "_cited_by",
+        "_ids",
+        "_next_stamp",
+        "_owner",
+        "_references",
+        "_size",
+        "_stamp",
+        "_stamps",
+        "_valid",
+        "_version",
+    )
+
+    def __init__(self, articles: list[Article], version: int = 0) -> None:
+        self._articles = articles
+        self._version = version
+        self._size = 0
+        # Stamps grow with the position in the list, so they keep the order
+        # of the articles while others are replaced or dropped around them
+        self._stamps = array("q")
+        self._stamp: dict[int, int] = {}
+        self._next_stamp = 0
+        self._owner: dict[str, Article] = {}
+        self._cited_by: dict[int, list[Article]] = {}
+        # What the indexed articles looked like, to notice changes in place
+        self._ids: dict[int, tuple[Article, tuple[str, ...]]] = {}
+        self._references: dict[int, tuple[int, ...]] = {}
+        self._valid = True
+
+    @classmethod
+    def build(
+        cls,
+        articles: list[Article],
+        version: int = 0,
+    ) -> "DeduplicationIndex | None":
+        """Index a list of articles.
+
+        :param articles: a deduplicated list of articles.
+        :param version: version of the list given by its owner.
+        :return: the index, or `None` if the list can't be indexed.
+        """
+        if not articles:
+            return None
+        index = cls(articles, version)
+        for article in articles:
+            if not article.ids or id(article) in index._stamp:
+                return None
+            index._place(article)
+            if not index._claim(article):
+                return None
+        for article in articles:
+            if not index._cite(article, _distinct(article.references).values()):
+                return None
+            index._references[id(article)] = tuple(map(id, article.references))
+        index._size = len(articles)
+        return index
+
+    def covers(self, articles: list[Article], version: int = 0) -> bool:
+        """Tell if the index is up to date with a version of a list of articles.
+
+        Besides the version, this looks at the ids and references of every
+        indexed article, which is still much cheaper than building the index.
+        """
+        return (
+            self._valid
+            and self._version == version
+            and self._articles is articles
+            and len(articles) == self._size
+            and self._unchanged(articles)
+        )
+
+    def _unchanged(self, articles: list[Article]) -> bool:
+        stamp = self._stamp
+        references = self._references
+        for article, expected in zip(articles, self._stamps, strict=True):
+            if stamp.get(id(article)) != expected:
+                return False
+            if references[id(article)] != tuple(map(id, article.references)):
+                return False
+        return all(tuple(article.ids) == ids for article, ids in self._ids.values())
+
+    def add(
+        self,
+        articles: Iterable[Article],
+        *,
+        in_place: bool = False,
+        version: int = 0,
+    ) -> list[Article]:
+        """Deduplicate new articles against the indexed list.
+
+        The index is updated to the result, so it can't be used with the
+        previous list anymore.
+
+        :param articles: the articles to add, with their references.
+        :param in_place: change the indexed list instead of a copy.
+        :param version: version of the result given by its owner.
+        :return: the deduplicated list with the new articles.
+        """
+        roots = list(articles)
+        found = self._walk(roots)
+        groups = self._group(found)
+        reps = self._merge(groups)
+
+        merged = self._articles if in_place else list(self._articles)
+        # Articles in the list citing the ones replaced and articles new to it
+        citers: dict[int, Article] = {}
+        added: dict[int, Article] = {}
+        replaced: list[Article] = []
+        orphans: list[Article] = []
+        for (old, _), rep in zip(groups, reps, strict=True):
+            for article in old:
+                citers.update((id(c), c) for c in self._cited_by.pop(id(article), ()))
+            orphans.extend(self._replace(merged, old, rep))
+            replaced.extend(old)
+            added[id(rep)] = rep
+        for rep in self._append(merged, roots):
+            added[id(rep)] = rep
+
+        # The articles changed are new, the ones given are copied first
+        fresh = {id(rep) for rep in reps}
+        copies: dict[int, Article] = {}
+        pending = list(citers.values())
+        while pending:
+            self._own(merged, pending, fresh, copies, replaced)
+            # Indexed references new to the list are copied only when their
+            # references change, which the copies made so far can cause
+            pending = [
+                article
+                for key, article in added.items()
+                if key not in fresh and key not in copies and self._stale(article)
+            ]
+        for key, article in copies.items():
+            if key not in added:
+                orphans.extend(self._rewire(article, cited=True))
+        for key, rep in added.items():
+            article = copies.get(key, rep)
+            if id(article) in self._stamp:
+                orphans.extend(self._rewire(article, cited=False))
+        self._forget([*orphans, *found, *reps, *replaced])
+        self._articles = merged
+        self._size = len(merged)
+        self._version = version
+        return merged
+
+    def _indexed(self, article: Article) -> bool:
+        return id(article) in self._stamp or id(article) in self._cited_by
+
+    def _walk(self, roots: list[Article]) -> list[Article]:
+        """Return the articles not indexed yet in the order they are found.
+
+        This follows `Collection._all_articles` as if the indexed articles
+        had been walked first.
+        """
+        found: dict[int, Article] = {}
+        expanded: set[int] = set()
+        for root in roots:
+            if not self._indexed(root):
+                found.setdefault(id(root), root)
+            if id(root) in self._stamp or id(root) in expanded:
+                continue
+            expanded.add(id(root))
+            for reference in root.references:
+                if not self._indexed(reference):
+                    found.setdefault(id(reference), reference)
+        return list(found.values())
+
+    def _group(
+        self,
+        found: list[Article],
+    ) -> list[tuple[list[Article], list[Article]]]:
+        """Group the new articles with the indexed ones sharing their ids.
+
+        :return: the indexed and the new articles of every group.
+        """
+        sets = UnionFind()
+        articles: list[Article] = []
+        element_of: dict[int, int] = {}
+        element_by_id: dict[str, int] = {}
+        for article in found:
+            if not article.ids:
+                continue
+            element = sets.add()
+            articles.append(article)
+            for id_ in article.ids:
+                owner = self._owner.get(id_)
+                if owner is None:
+                    other = element_by_id.setdefault(id_, element)
+                else:
+                    other = element_of.get(id(owner), -1)
+                    if other < 0:
+                        other = element_of[id(owner)] = sets.add()
+                        articles.append(owner)
+                sets.union(element, other)
+
+        groups: dict[int, tuple[list[Article], list[Article]]] = {}
+        for element, article in enumerate(articles):
+            old, new = groups.setdefault(sets.find(element), ([], []))
+            (old if self._indexed(article) else new).append(article)
+        return list(groups.values())
+
+    def _merge(
+        self,
+        groups: list[tuple[list[Article], list[Article]]],
+    ) -> list[Article]:
+        """Merge every group in order of appearance and give it its ids.
+
+        :return: the representative of every group.
+        """
+        # Positions have to be read before the index changes
+        for old, _ in groups:
+            if len(old) > 1:
+                old.sort(key=self._position)
+        reps = []
+        for old, new in groups:
+            members = old + new
+            # A lone new article is copied so its references can be changed
+            rep = (
+                _copy(members[0]) if len(members) == 1 else Article.merge_many(members)
+            )
+            for id_ in rep.ids:
+                self._owner[id_] = rep
+            reps.append(rep)
+        return reps
+
+    def _position(self, article: Article) -> tuple[int, int]:
+        """Return where an indexed article is first found walking the list."""
+        positions = []
+        if id(article) in self._stamp:
+            positions.append((self._stamp[id(article)], -1))
+        for citer in self._cited_by.get(id(article), ()):
+            references = citer.references
+            slot = next(i for i, r in enumerate(references) if r is article)
+            positions.append((self._stamp[id(citer)], slot))
+        return min(positions)
+
+    def _place(self, article: Article) -> None:
+        self._stamp[id(article)] = self._next_stamp
+        self._stamps.append(self._next_stamp)
+        self._next_stamp += 1
+        self._watch(article)
+
+    def _watch(self, article: Article) -> None:
+        self._ids[id(article)] = (article, tuple(article.ids))
+
+    def _replace(
+        self,
+        merged: list[Article],
+        old: list[Article],
+        rep: Article,
+    ) -> list[Article]:
+        """Put the representative of a group in place of its indexed articles.
+
+        It takes the place of the first one in the list and the others are
+        dropped, along with their citations.
+
+        :return: the references left without citations.
+        """
+        orphans = []
+        stamps = []
+        for article in old:
+            stamp = self._stamp.pop(id(article), None)
+            if stamp is not None:
+                stamps.append(stamp)
+                references = _distinct(article.references).values()
+                orphans.extend(self._uncite(article, references))
+        if not stamps:
+            return orphans
+        stamps.sort()
+        for stamp in reversed(stamps[1:]):
+            position = bisect_left(self._stamps, stamp)
+            del merged[position]
+            del self._stamps[position]
+        merged[bisect_left(self._stamps, stamps[0])] = rep
+        self._stamp[id(rep)] = stamps[0]
+        self._watch(rep)
+        return orphans
+
+    def _append(self, merged: list[Article], roots: list[Article]) -> list[Article]:
+        """Append the representatives of the new articles not in the list.
+
+        :return: the articles appended.
+        """
+        appended = []
+        for article in roots:
+            if not article.ids:
+                continue
+            rep = self._owner[next(iter(article.ids))]
+            if id(rep) not in self._stamp:
+                self._place(rep)
+                merged.append(rep)
+                appended.append(rep)
+        return appended
+
+    def _own(
+        self,
+        merged: list[Article],
+        articles: list[Article],
+        fresh: set[int],
+        copies: dict[int, Article],
+        replaced: list[Article],
+    ) -> None:
+        """Put copies in place of articles of the list whose references change.
+
+        The articles citing a copy have to point to it, so they are copied
+        as well, and so on. The copies take the place and the citations of
+        the originals, and the originals are added to the replaced articles.
+
+        :param articles: the articles to copy, emptied on return.
+        :param fresh: articles made by the index, which aren't copied.
+        :param copies: the copy of every article copied so far.
+        """
+        while articles:
+            article = articles.pop()
+            if id(article) in fresh or id(article) not in self._stamp:
+                continue
+            copy = _copy(article)
+            copies[id(article)] = copy
+            fresh.add(id(copy))
+            stamp = self._stamp.pop(id(article))
+            merged[bisect_left(self._stamps, stamp)] = copy
+            self._stamp[id(copy)] = stamp
+            self._watch(copy)
+            for id_ in copy.ids:
+                if self._owner.get(id_) is article:
+                    self._owner[id_] = copy
+            for reference in _distinct(article.references).values():
+                citing = self._cited_by.get(id(reference), [])
+                for i, citer in enumerate(citing):
+                    if citer is article:
+                        citing[i] = copy
+            # Its citers cite the copy once they are rewired
+            articles.extend(self._cited_by.pop(id(article), ()))
+            replaced.append(article)
+
+    def _stale(self, article: Article) -> bool:
+        """Tell if some reference of an article isn't the owner of its ids."""
+        return any(
+            not reference.ids
+            or self._owner.get(next(iter(reference.ids)), reference) is not reference
+            for reference in article.references
+        )
+
+    def _rewire(self, article: Article, *, cited: bool) -> list[Article]:
+        """Point the references of an article to the articles owning their ids.
+
+        :param cited: whether the references of the article are recorded.
+        :return: the references left without citations.
+        """
+        before = _distinct(article.references) if cited else {}
+        # Articles given to the index are left alone when nothing changes
+        if self._stale(article):
+            article.references = [
+                self._owner.get(next(iter(reference.ids)), reference)
+                for reference in article.references
+                if reference.ids
+            ]
+        after = _distinct(article.references)
+        orphans = self._uncite(
+            article, [r for key, r in before.items() if key not in after]
+        )
+        if not self._cite(
+            article, [r for key, r in after.items() if key not in before]
+        ):
+            self._valid = False
+        self._references[id(article)] = tuple(map(id, article.references))
+        return orphans
+
+    def _claim(self, article: Article) -> bool:
+        """Make an article the owner of its ids, unless others own them."""
+        for id_ in article.ids:
+            if self._owner.setdefault(id_, article) is not article:
+                return False
+        return True
+
+    def _cite(self, article: Article, references: Iterable[Article]) -> bool:
+        """Record that an article cites some references.
+
+        :return: whether the list can still be indexed.
+        """
+        for reference in references:
+            if not reference.ids:
+                return False
+            if not self._indexed(reference):
+                if not self._claim(reference):
+                    return False
+                self._watch(reference)
+            self._cited_by.setdefault(id(reference), []).append(article)
+        return True
+
+    def _uncite(self, article: Article, references: Iterable[Article]) -> list[Article]:
+        """Forget that an article cites some references.
+
+        :return: the references left without citations.
+        """
+        orphans = []
+        for reference in references:
+            citers = self._cited_by.get(id(reference))
+            if citers is None:
+                continue
+            for i, citer in enumerate(citers):
+                if citer is article:
+                    del citers[i]
+                    break
+            if not citers:
+                del self._cited_by[id(reference)]
+                orphans.append(reference)
+        return orphans
+
+    def _forget(self, articles: Iterable[Article]) -> None:
+        """Drop the ids of the articles that are no longer in the list."""
+        for article in articles:
+            if self._indexed(article):
+                continue
+            self._ids.pop(id(article), None)
+            self._references.pop(id(article), None)
+            for id_ in article.ids:
+                if self._owner.get(id_) is article:
+                    del self._owner[id_]
@@ -0,0 +1,124 @@
+"""Compact citation graph with integer nodes."""
+
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import TYPE_CHECKING
+
+from .citations import CitationIndex, articles_by_key
+
+if TYPE_CHECKING:
+    from .collection import Collection
+
+UNKNOWN = -1
+
+
+def _int32(values: Iterable[int]) -> "array[int]":
+    return array("i", values)
+
+
+def _sparse_rows(
+    size: int,
+    edges: list[tuple[int, int]],
+) -> tuple["array[int]", "array[int]"]:
+    """Sort edges by source into offsets and targets, keeping their order."""
+    counts = [0] * (size + 1)
+    for source, _ in edges:
+        counts[source + 1] += 1
+    offsets = _int32(accumulate(counts))
+    targets = _int32([0] * len(edges))
+    position = list(offsets[:-1])
+    for source, target in edges:
+        targets[position[source]] = target
+        position[source] += 1
+    return offsets, targets
+
+
+@dataclass
+class CitationGraph:
+    """Citation graph in compressed sparse row form.
+
+    Node `i` is the article with key `keys[i]` and it cites the nodes in
+    `targets[offsets[i]:offsets[i + 1]]`. The arrays hold 32 bit integers,
+    four bytes per edge, and the years and times cited of the nodes are
+    `UNKNOWN` when missing.
+
+    The nodes and edges are the ones of `Sap.create_graph`, in the same
+    order, so node `i` is the `i`-th node of that graph.
+    """
+
+    keys: list[str]
+    offsets: "array[int]"
+    targets: "array[int]"
+    years: "array[int]"
+    times_cited: "array[int]"
+
+    @classmethod
+    def from_collection(cls, collection: "Collection") -> "CitationGraph":
+        """Build the citation graph of a collection."""
+        # The references may have changed since the cached index was built
+        citations = CitationIndex(collection.articles)
+        nodes = dict.fromkeys(citations.keys())
+        articles = articles_by_key(collection.articles)
+        nodes.update(dict.fromkeys(articles))
+        keys = list(nodes)
+        index = {key: i for i, key in enumerate(keys)}
+
+        offsets, targets = _sparse_rows(
+            len(keys),
+            [(index[source], index[target]) for source, target in citations.edges()],
+        )
+
+        values = [articles[key] for key in keys]
+        return cls(
+            keys=keys,
+            offsets=offsets,
+            targets=targets,
+            years=_int32(UNKNOWN if a.year is None else a.year for a in values),
+            times_cited=_int32(
+                UNKNOWN if a.times_cited is None else a.times_cited for a in values
+            ),
+        )
+
+    def __len__(self) -> int:
+        """Return the number of nodes."""
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        """Return the number of edges."""
+        return len(self.targets)
+
+    def successors(self, node: int) -> "array[int]":
+        """Return the nodes cited by a node."""
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def out_degree(self, node: int) -> int:
+        """Return the number of nodes cited by a node."""
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def in_degrees(self) -> "array[int]":
+        """Return the number of nodes citing every node."""
+        degrees = _int32([0] * len(self.keys))
+        for target in self.targets:
+            degrees[target] += 1
+        return degrees
+
+    def transpose(self) -> "CitationGraph":
+        """Return the graph with its edges reversed, cited to citing."""
+        offsets, sources = _sparse_rows(
+            len(self.keys),
+            [
+                (target, source)
+                for source in range(len(self.keys))
+                for target in self.successors(source)
+            ],
+        )
+        return CitationGraph(
+            keys=self.keys,
+            offsets=offsets,
+            targets=sources,
+            years=self.years,
+            times_cited=self.times_cited,
+        )
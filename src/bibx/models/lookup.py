@@ -0,0 +1,114 @@
+"""Indexes to find the articles of a collection without scanning it."""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable
+
+from .article import Article
+
+_DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "doi:")
+
+
+def normalize_doi(doi: str) -> str:
+    """Normalize a DOI, dropping the resolver and lowering its case."""
+    doi = doi.strip().lower()
+    for prefix in _DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix) :]
+    return doi
+
+
+def normalize_name(name: str) -> str:
+    """Normalize the name of an author or a journal to compare it."""
+    return " ".join(name.split()).casefold()
+
+
+def _dois(article: Article) -> set[str]:
+    dois = {normalize_doi(id_) for id_ in article.ids if id_.startswith("doi:")}
+    if article.doi:
+        dois.add(normalize_doi(article.doi))
+    return dois
+
+
+def _first_author(article: Article) -> set[str]:
+    return {normalize_name(article.authors[0])} if article.authors else set()
+
+
+def _journal(article: Article) -> set[str]:
+    return {normalize_name(article.journal)} if article.journal else set()
+
+
+class LookupIndex:
+    """Lazily built indexes over a list of articles.
+
+    Each index is built the first time it is used and kept until the list
+    changes. The index can't see the articles being changed in place, so
+    it only tells if it is still valid by the identity and size of the list.
+    """
+
+    __slots__ = ("_articles", "_by_id", "_by_key", "_size", "_years")
+
+    def __init__(self, articles: list[Article]) -> None:
+        self._articles = articles
+        self._size = len(articles)
+        self._by_id: dict[str, Article] | None = None
+        self._by_key: dict[str, dict[str, list[Article]]] = {}
+        self._years: tuple[list[int], list[Article]] | None = None
+
+    def covers(self, articles: list[Article]) -> bool:
+        """Tell if the index is up to date with a list of articles."""
+        return self._articles is articles and len(articles) == self._size
+
+    def by_id(self, id_: str) -> Article | None:
+        """Return the article with an id."""
+        if self._by_id is None:
+            self._by_id = {}
+            for article in self._articles:
+                for key in article.ids:
+                    self._by_id.setdefault(key, article)
+        return self._by_id.get(id_)
+
+    def by_doi(self, doi: str) -> list[Article]:
+        """Return the articles with a DOI, compared after normalizing it."""
+        return self._lookup("doi", _dois, normalize_doi(doi))
+
+    def by_first_author(self, author: str) -> list[Article]:
+        """Return the articles with a first author, compared after normalizing it."""
+        return self._lookup("author", _first_author, normalize_name(author))
+
+    def by_journal(self, journal: str) -> list[Article]:
+        """Return the articles of a journal, compared after normalizing it."""
+        return self._lookup("journal", _journal, normalize_name(journal))
+
+    def by_years(self, start: int | None, end: int | None) -> list[Article]:
+        """Return the articles published between two years, both included.
+
+        The articles are sorted by year and keep their order within a year.
+        """
+        if self._years is None:
+            dated = sorted(
+                (article.year, position)
+                for position, article in enumerate(self._articles)
+                if article.year is not None
+            )
+            self._years = (
+                [year for year, _ in dated],
+                [self._articles[position] for _, position in dated],
+            )
+        years, articles = self._years
+        low = 0 if start is None else bisect_left(years, start)
+        high = len(years) if end is None else bisect_right(years, end)
+        return articles[low:high]
+
+    def _lookup(
+        self,
+        name: str,
+        keys: Callable[[Article], Iterable[str]],
+        key: str,
+    ) -> list[Article]:
+        index = self._by_key.get(name)
+        if index is None:
+            index = self._by_key[name] = {}
+            for article in self._articles:
+                for article_key in keys(article):
+                    index.setdefault(article_key, []).append(article)
+        return list(index.get(key, ()))
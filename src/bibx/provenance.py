@@ -0,0 +1,120 @@
+"""Handles to the original text of the articles."""
+
+import codecs
+import itertools
+import weakref
+from collections.abc import Callable, Iterator
+from enum import Enum
+from typing import NamedTuple, TextIO
+
+
+class Provenance(Enum):
+    """How the sources read from a file are kept in the articles."""
+
+    TEXT = "text"
+    OFFSET = "offset"
+
+
+# Handles are found by token when spans come back from a worker process,
+# only while something else keeps them alive
+_handles: "weakref.WeakValueDictionary[int, SourceFile]" = weakref.WeakValueDictionary()
+_tokens = itertools.count()
+
+
+class SourceFile:
+    """A file read by a source, shared by the spans of its articles.
+
+    The spans keep the file alive, so it is released along with the last
+    article read from it. A handle is pickled as a token, so the spans sent
+    to a worker process come back pointing to the same file.
+    """
+
+    __slots__ = ("__weakref__", "file", "token")
+
+    def __init__(self, file: TextIO | None, token: int | None = None) -> None:
+        self.file = file
+        self.token = next(_tokens) if token is None else token
+        if file is not None:
+            _handles[self.token] = self
+
+    def __reduce__(self) -> tuple[Callable[[int], "SourceFile"], tuple[int]]:
+        """Pickle the token of the handle instead of its file."""
+        return _find_handle, (self.token,)
+
+
+def _find_handle(token: int) -> SourceFile:
+    handle = _handles.get(token)
+    # Worker processes don't have the files, they only pass the spans along
+    return SourceFile(None, token) if handle is None else handle
+
+
+class SourceSpan(NamedTuple):
+    """Location of the text of an article in one of the files read.
+
+    The offsets are in bytes for binary backed files and in characters for
+    in memory ones like `io.StringIO`. The text is read back from the file
+    only when needed, so the file has to stay open until then.
+    """
+
+    file: SourceFile
+    offset: int
+    length: int
+
+    @property
+    def text(self) -> str:
+        """Read the text of the span from its file."""
+        return read_span(self)
+
+    def __str__(self) -> str:
+        """Return the text of the span."""
+        return self.text
+
+
+def read_span(span: SourceSpan) -> str:
+    """Read the text pointed by a span.
+
+    :param span: a span created while reading a file.
+    :return: the text with Windows line endings turned into plain ones.
+    """
+    file = span.file.file
+    if file is None:
+        message = "the file of this span is not available in this process"
+        raise ValueError(message)
+    buffer = getattr(file, "buffer", None)
+    if buffer is None:
+        position = file.tell()
+        file.seek(span.offset)
+        text = file.read(span.length)
+        file.seek(position)
+        return text
+    position = buffer.tell()
+    buffer.seek(span.offset)
+    data = buffer.read(span.length)
+    buffer.seek(position)
+    return data.decode(file.encoding, file.errors or "strict").replace("\r\n", "\n")
+
+
+def iter_lines(file: TextIO) -> Iterator[tuple[int, int, str]]:
+    """Yield the lines of a file along with the offsets of their content.
+
+    Each item is the offset where the line starts, the offset where its
+    content ends (before the line break) and the decoded line with a plain
+    line ending, like the lines of a text file.
+
+    :param file: a file open in text mode at its beginning.
+    :return: a generator of `(start, end, line)` tuples.
+    """
+    buffer = getattr(file, "buffer", None)
+    if buffer is None:
+        start = 0
+        for line in file:
+            content = line.rstrip("\r\n")
+            yield start, start + len(content), content + "\n"
+            start += len(line)
+        return
+    decoder = codecs.getincrementaldecoder(file.encoding)(file.errors or "strict")
+    start = 0
+    for raw in buffer:
+        content = raw.rstrip(b"\r\n")
+        yield start, start + len(content), decoder.decode(content) + "\n"
+        start += len(raw)
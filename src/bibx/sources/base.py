@@ -1,11 +1,52 @@
-from typing import Protocol
+"""Builders for diverse Collection types."""
 
+from collections.abc import Callable, Iterable, Iterator
+from typing import Protocol, TypeVar
+
+from bibx.models.article import Article
 from bibx.models.collection import Collection
+from bibx.utils import parallel_map
+
+from .reference_table import ReferenceTable
+
+T = TypeVar("T")
 
 
 class Source(Protocol):
     """Protocol for classes that build collections of articles."""
 
+    def iter_articles(self) -> Iterable[Article]:
+        """Yield the articles of the source one by one."""
+        ...
+
     def build(self) -> Collection:
         """Build a collection of articles."""
         ...
+
+
+def parse_records(
+    parse: Callable[..., Article | None],
+    records: Iterable[T],
+    workers: int,
+    reference_table: ReferenceTable,
+) -> Iterator[Article]:
+    """Parse records into articles, skipping the ones that can't be parsed.
+
+    With one worker the references are parsed through the table. With more
+    workers the records are parsed in a process pool and the references
+    are shared through the table once they're back in this process.
+
+    :param parse: picklable function from a record and an optional table to
+                  an optional article.
+    :param records: the records to parse.
+    :param workers: number of processes used to parse the records.
+    :param reference_table: table used to share the references.
+    :return: a generator of articles in the same order as the records.
+    """
+    articles: Iterable[Article | None]
+    if workers > 1:
+        articles = reference_table.share(parallel_map(parse, records, workers))
+    else:
+        articles = (parse(record, reference_table) for record in records)
+    yield from (article for article in articles if article is not None)
+    reference_table.log_stats()
@@ -1,10 +1,11 @@
 import logging
 from collections import Counter
+from collections.abc import Iterable
 from enum import Enum
 from urllib.parse import urlparse
 
 from bibx.clients.openalex import OpenAlexClient, Work
-from bibx.models.article import Article
+from bibx.models.article import Article, IdSet
 from bibx.models.collection import Collection
 
 from .base import Source
@@ -41,6 +42,10 @@ class OpenAlexSource(Source):
 
     def build(self) -> Collection:
         """Build a collection of articles from the OpenAlex API."""
+        return Collection(Collection.deduplicate_articles(self.iter_articles()))
+
+    def iter_articles(self) -> Iterable[Article]:
+        """Yield the articles returned by the OpenAlex API."""
         logger.info("building collection for query %s", self.query)
         works = self.client.list_recent_articles(self.query, self.limit)
         cache = {work.id: work for work in works}
@@ -67,7 +72,6 @@ class OpenAlexSource(Source):
             for openalexid, work in cache.items()
         }
         logger.info("enriching references")
-        articles = []
         for work in works:
             article = article_cache[work.id]
             article.references = [
@@ -75,8 +79,7 @@ class OpenAlexSource(Source):
                 for reference in work.referenced_works
                 if reference != work.id
             ]
-            articles.append(article)
-        return Collection(Collection.deduplicate_articles(articles))
+            yield article
 
     @staticmethod
     def _invert_name(name: str) -> str:
@@ -101,12 +104,12 @@ class OpenAlexSource(Source):
             permalink = work.primary_location.landing_page_url
         article = Article(
             label=work.id,
-            ids={
+            ids=IdSet(
                 f"{source}:{id_}"
                 if source != "doi"
                 else f"{source}:{cls._extract_doi(id_)}"
                 for source, id_ in work.ids.items()
-            },
+            ),
             authors=[cls._invert_name(a.author.display_name) for a in work.authorships],
             year=work.publication_year,
             title=work.title,
@@ -130,7 +133,7 @@ class OpenAlexSource(Source):
     def _reference_to_article(reference: str) -> Article:
         return Article(
             label=reference,
-            ids={f"openalex:{reference}"},
+            ids=IdSet((f"openalex:{reference}",)),
             _permalink=reference,
             sources={"openalex"},
         )
@@ -0,0 +1,102 @@
+"""Shared table of parsed cited references."""
+
+import logging
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from typing import TypeVar, cast
+
+from bibx.models.article import Article
+
+logger = logging.getLogger(__name__)
+
+A = TypeVar("A", bound=Article | None)
+
+_DEFAULT_MAXSIZE = 1_000_000
+
+
+def _normalize(reference: str) -> str:
+    return " ".join(reference.split())
+
+
+class ReferenceTable:
+    """Bounded table that hands out one article per unique reference string.
+
+    The same cited reference shows up thousands of times in a single export,
+    the table parses it once and every citing article shares the resulting
+    object. References are keyed by their text with normalized whitespace
+    and the least recently used entries are evicted after `maxsize`.
+
+    A source uses one table for all its files, pass the same table to
+    several sources of the same format to share it between builds.
+    """
+
+    def __init__(self, maxsize: int = _DEFAULT_MAXSIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._articles: OrderedDict[str, Article | None] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of references in the table."""
+        return len(self._articles)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the table."""
+        return (
+            f"ReferenceTable(size={len(self)}, hits={self.hits}, misses={self.misses})"
+        )
+
+    def get(self, reference: str, parse: Callable[[str], A]) -> A:
+        """Return the shared article for a reference, parsing it on a miss.
+
+        Exceptions raised by `parse` are propagated and nothing is stored.
+
+        :param reference: the reference as found in the file.
+        :param parse: function that turns the reference into an article.
+        :return: the shared article.
+        """
+        key = _normalize(reference)
+        if key in self._articles:
+            self.hits += 1
+            self._articles.move_to_end(key)
+            return cast(A, self._articles[key])
+        self.misses += 1
+        article = parse(reference)
+        self._store(key, article)
+        return article
+
+    def intern(self, article: Article) -> Article:
+        """Return the shared article with the same label as the given one."""
+        key = _normalize(article.label)
+        shared = self._articles.get(key)
+        if shared is not None:
+            self.hits += 1
+            self._articles.move_to_end(key)
+            return shared
+        self.misses += 1
+        self._store(key, article)
+        return article
+
+    def share(self, articles: Iterable[Article | None]) -> Iterator[Article | None]:
+        """Make the references of already parsed articles point to the table.
+
+        This is used when the articles were parsed in other processes.
+        """
+        for article in articles:
+            if article is not None:
+                article.references = [self.intern(r) for r in article.references]
+            yield article
+
+    def _store(self, key: str, article: Article | None) -> None:
+        self._articles[key] = article
+        if len(self._articles) > self.maxsize:
+            self._articles.popitem(last=False)
+
+    def log_stats(self) -> None:
+        """Log the hits and misses of the table."""
+        logger.info(
+            "reference table has %d entries, %d hits and %d misses",
+            len(self),
+            self.hits,
+            self.misses,
+        )
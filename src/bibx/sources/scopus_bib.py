@@ -1,39 +1,138 @@
 import json
 import re
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from contextlib import suppress
 from typing import TextIO
 
-import bibtexparser
+from bibtexparser.bparser import BibTexParser
 
 from bibx.exceptions import MissingCriticalInformationError
-from bibx.models.article import Article
+from bibx.models.article import Article, IdSet
 from bibx.models.collection import Collection
+from bibx.provenance import Provenance, SourceFile, SourceSpan, iter_lines
 
-from .base import Source
+from .base import Source, parse_records
+from .reference_table import ReferenceTable
+
+_ENTRY_START_PATTERN = re.compile(r"^@\w+\s*[{(]\s*(?P<key>[^,\s]*)")
+_ENTRIES_PER_CHUNK = 100
 
 
 class ScopusBibSource(Source):
     """Builder for collections of articles from Scopus BibTeX files."""
 
-    def __init__(self, *scopus_files: TextIO) -> None:
+    def __init__(
+        self,
+        *scopus_files: TextIO,
+        workers: int = 1,
+        reference_table: ReferenceTable | None = None,
+        provenance: Provenance = Provenance.TEXT,
+    ) -> None:
         self._files = scopus_files
+        self._workers = workers
+        self._provenance = provenance
+        self._handle: SourceFile | None = None
+        self.reference_table = (
+            ReferenceTable() if reference_table is None else reference_table
+        )
         for file in self._files:
             file.seek(0)
 
     def build(self) -> Collection:
         """Build a collection of articles from Scopus BibTeX files."""
-        articles = self._get_articles_from_files()
-        return Collection(Collection.deduplicate_articles(list(articles)))
+        return Collection(Collection.deduplicate_articles(self.iter_articles()))
 
-    def _get_articles_from_files(self) -> Iterable[Article]:
-        for file in self._files:
-            db = bibtexparser.load(file)
-            for entry in db.entries:
-                with suppress(MissingCriticalInformationError):
-                    yield self._article_from_entry(entry)
+    def iter_articles(self) -> Iterable[Article]:
+        """Yield the articles in the files a few entries at a time.
+
+        With more than one worker the entries are parsed in a process pool,
+        the articles are yielded in the same order as the entries.
+        """
+        entries = (
+            entry
+            for file in self._files
+            for entry in self._iter_entries(file, self._open_handle(file))
+        )
+        yield from parse_records(
+            self._parse_entry, entries, self._workers, self.reference_table
+        )
+
+    def _open_handle(self, file: TextIO) -> SourceFile | None:
+        # Held by the source while the file is read, so spans back from the
+        # workers find it, and by its entries after that
+        handle = SourceFile(file) if self._provenance is Provenance.OFFSET else None
+        self._handle = handle
+        return handle
+
+    @classmethod
+    def _iter_entries(
+        cls,
+        file: TextIO,
+        handle: SourceFile | None = None,
+    ) -> Iterable[tuple[dict, SourceSpan | None]]:
+        # A single parser per file keeps any `@string` macros around
+        parser = BibTexParser()
+        parser.expect_multiple_parse = True
+        entries = parser.bib_database.entries
+        lines: Iterable[tuple[int, int, str]] = ((0, 0, line) for line in file)
+        if handle is not None:
+            lines = iter_lines(file)
+        chunk: list[str] = []
+        # Key, start and end of the text of each entry in the chunk
+        spans: list[tuple[str, int, int]] = []
+        for start, end, line in lines:
+            match = _ENTRY_START_PATTERN.match(line)
+            if match:
+                if len(spans) == _ENTRIES_PER_CHUNK:
+                    parser.parse("".join(chunk))
+                    yield from cls._with_spans(entries, spans, handle)
+                    entries.clear()
+                    chunk = []
+                    spans = []
+                spans.append((match.group("key"), start, end))
+            elif spans and line.strip():
+                spans[-1] = (spans[-1][0], spans[-1][1], end)
+            chunk.append(line)
+        if chunk:
+            parser.parse("".join(chunk))
+            yield from cls._with_spans(entries, spans, handle)
+            entries.clear()
+
+    @staticmethod
+    def _with_spans(
+        entries: list[dict],
+        spans: list[tuple[str, int, int]],
+        handle: SourceFile | None,
+    ) -> Iterator[tuple[dict, SourceSpan | None]]:
+        # The parser skips comments and macros, so the entries are matched
+        # to the spans by their key, in order.
+        remaining = iter(spans if handle is not None else ())
+        for entry in entries:
+            span = None
+            for key, start, end in remaining:
+                if handle is not None and key == entry.get("ID"):
+                    span = SourceSpan(handle, start, end - start)
+                    break
+            yield entry, span
+
+    @classmethod
+    def _parse_entry(
+        cls,
+        record: tuple[dict, SourceSpan | None],
+        reference_table: ReferenceTable | None = None,
+    ) -> Article | None:
+        entry, span = record
+        with suppress(MissingCriticalInformationError):
+            return cls._article_from_entry(entry, reference_table, span)
+        return None
 
-    def _article_from_entry(self, entry: dict) -> Article:
+    @classmethod
+    def _article_from_entry(
+        cls,
+        entry: dict,
+        reference_table: ReferenceTable | None = None,
+        span: SourceSpan | None = None,
+    ) -> Article:
         if "author" not in entry or "year" not in entry:
             raise MissingCriticalInformationError()
         if "note" in entry:
@@ -41,7 +140,7 @@ class ScopusBibSource(Source):
             times_cited = int(match.groups()[0]) if match else None
         else:
             times_cited = None
-        ids = set()
+        ids = IdSet()
         doi = entry.get("doi")
         if doi is not None:
             ids.add(f"doi:{doi}")
@@ -58,23 +157,33 @@ class ScopusBibSource(Source):
                 page=entry.get("art_number"),
                 doi=entry.get("doi"),
                 references=list(
-                    self._articles_from_references(entry.get("references"))
+                    cls._articles_from_references(
+                        entry.get("references"), reference_table
+                    )
                 ),
                 keywords=entry.get("keywords", "").split("; "),
                 extra=entry,
-                sources={json.dumps(entry)},
+                sources={json.dumps(entry) if span is None else span},
                 times_cited=times_cited,
             )
             .add_simple_id()
             .set_simple_label()
         )
 
-    def _articles_from_references(self, references: str | None) -> Iterable[Article]:
+    @classmethod
+    def _articles_from_references(
+        cls,
+        references: str | None,
+        reference_table: ReferenceTable | None = None,
+    ) -> Iterable[Article]:
         if references is None:
             references = ""
         for reference in references.split("; "):
             with suppress(MissingCriticalInformationError):
-                yield self._article_from_reference(reference)
+                if reference_table is None:
+                    yield cls._article_from_reference(reference)
+                else:
+                    yield reference_table.get(reference, cls._article_from_reference)
 
     @staticmethod
     def _article_from_reference(reference: str) -> Article:
@@ -87,7 +196,7 @@ class ScopusBibSource(Source):
         doi = match.groups()[0] if match else None
         return Article(
             label=reference,
-            ids=set() if doi is None else {f"doi:{doi}"},
+            ids=IdSet() if doi is None else IdSet((f"doi:{doi}",)),
             authors=[author],
             year=year,
             doi=doi,
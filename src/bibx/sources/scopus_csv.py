@@ -8,10 +8,11 @@ from typing import Annotated, TextIO
 from pydantic import BaseModel, Field
 from pydantic.functional_validators import BeforeValidator
 
-from bibx.models.article import Article
+from bibx.models.article import Article, IdSet
 from bibx.models.collection import Collection
 
-from .base import Source
+from .base import Source, parse_records
+from .reference_table import ReferenceTable
 
 _NUM_AUTHOR_PARTS = 3
 
@@ -96,60 +97,83 @@ class Row(BaseModel):
 class ScopusCsvSource(Source):
     """Builder for Scopus data from CSV files."""
 
-    def __init__(self, *files: TextIO) -> None:
+    def __init__(
+        self,
+        *files: TextIO,
+        workers: int = 1,
+        reference_table: ReferenceTable | None = None,
+    ) -> None:
         self._files = files
+        self._workers = workers
+        self.reference_table = (
+            ReferenceTable() if reference_table is None else reference_table
+        )
         for file in self._files:
             file.seek(0)
 
     def build(self) -> Collection:
         """Build the collection."""
-        articles = self._articles_from_files()
-        return Collection(articles=Collection.deduplicate_articles(list(articles)))
-
-    def _articles_from_files(self) -> Generator[Article, None, None]:
-        for file in self._files:
-            yield from self._parse_file(file)
-
-    def _parse_file(self, file: TextIO) -> Generator[Article, None, None]:
-        reader = csv.DictReader(file)
-        for row in reader:
-            datum = Row.model_validate(row)
-            if not datum.authors or not datum.year:
-                logger.info(
-                    "skipping row with missing authors or year: %s",
-                    datum.model_dump_json(indent=2),
-                )
-                continue
-            yield (
-                Article(
-                    label="",
-                    ids=set(),
-                    title=datum.title,
-                    authors=_rotate_authors(datum.authors),
-                    year=datum.year,
-                    journal=datum.journal,
-                    volume=datum.volume,
-                    issue=datum.issue,
-                    page=datum.page,
-                    doi=datum.doi,
-                    times_cited=datum.cited_by,
-                    references=list(
-                        filter(
-                            None,
-                            [
-                                self._article_from_reference(ref)
-                                for ref in datum.references
-                            ],
-                        )
-                    ),
-                    keywords=list(set(datum.author_keywords + datum.index_keywords)),
-                    sources={datum.source},
-                )
-                .add_simple_id()
-                .set_simple_label()
+        return Collection(
+            articles=Collection.deduplicate_articles(self.iter_articles())
+        )
+
+    def iter_articles(self) -> Generator[Article, None, None]:
+        """Yield the articles in the files one row at a time.
+
+        With more than one worker the rows are parsed in a process pool,
+        the articles are yielded in the same order as the rows.
+        """
+        rows = (row for file in self._files for row in csv.DictReader(file))
+        yield from parse_records(
+            self._article_from_row, rows, self._workers, self.reference_table
+        )
+
+    @classmethod
+    def _article_from_row(
+        cls,
+        row: dict[str, str],
+        reference_table: ReferenceTable | None = None,
+    ) -> Article | None:
+        datum = Row.model_validate(row)
+        if not datum.authors or not datum.year:
+            logger.info(
+                "skipping row with missing authors or year: %s",
+                datum.model_dump_json(indent=2),
+            )
+            return None
+        return (
+            Article(
+                label="",
+                ids=IdSet(),
+                title=datum.title,
+                authors=_rotate_authors(datum.authors),
+                year=datum.year,
+                journal=datum.journal,
+                volume=datum.volume,
+                issue=datum.issue,
+                page=datum.page,
+                doi=datum.doi,
+                times_cited=datum.cited_by,
+                references=list(
+                    filter(
+                        None,
+                        [
+                            cls._article_from_reference(ref)
+                            if reference_table is None
+                            else reference_table.get(ref, cls._article_from_reference)
+                            for ref in datum.references
+                        ],
+                    )
+                ),
+                keywords=list(set(datum.author_keywords + datum.index_keywords)),
+                sources={datum.source},
             )
+            .add_simple_id()
+            .set_simple_label()
+        )
 
-    def _article_from_reference(self, reference: str) -> Article | None:
+    @staticmethod
+    def _article_from_reference(reference: str) -> Article | None:
         try:
             *authors, journal, issue, year = reference.split(", ")
             if not authors:
@@ -158,7 +182,7 @@ class ScopusCsvSource(Source):
             _year = int(year.lstrip("(").rstrip(")"))
             return Article(
                 label=reference,
-                ids={reference},
+                ids=IdSet((reference,)),
                 authors=authors,
                 year=_year,
                 journal=journal,
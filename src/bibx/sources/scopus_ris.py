@@ -5,14 +5,17 @@ from collections.abc import Iterable
 from typing import TextIO
 
 from bibx.exceptions import InvalidScopusFileError, MissingCriticalInformationError
-from bibx.models.article import Article
+from bibx.models.article import Article, IdSet
 from bibx.models.collection import Collection
+from bibx.utils import can_memory_map, split_mapped_records, split_records
 
-from .base import Source
+from .base import Source, parse_records
+from .reference_table import ReferenceTable
 
 logger = logging.getLogger(__name__)
 
 _RIS_PATTERN = re.compile(r"^(((?P<key>[A-Z0-9]{2}))[ ]{2}-[ ]{1})?(?P<value>(.*))$")
+_RECORD_END = b"ER  -"
 
 
 def _size(file: TextIO) -> int:
@@ -40,19 +43,40 @@ def _joined(raw: list[str] | None) -> str | None:
 class ScopusRisSource(Source):
     """Builder for collections of articles from Scopus RIS files."""
 
-    def __init__(self, *ris_files: TextIO) -> None:
+    def __init__(
+        self,
+        *ris_files: TextIO,
+        workers: int = 1,
+        reference_table: ReferenceTable | None = None,
+        memory_map: bool = False,
+    ) -> None:
         self._files = ris_files
+        self._workers = workers
+        self._memory_map = memory_map
+        self.reference_table = (
+            ReferenceTable() if reference_table is None else reference_table
+        )
         for file in self._files:
             file.seek(0)
 
     def build(self) -> Collection:
         """Build a collection of articles from Scopus RIS files."""
-        articles = self._get_articles_from_files()
-        return Collection(Collection.deduplicate_articles(list(articles)))
-
-    def _get_articles_from_files(self) -> Iterable[Article]:
-        for file in self._files:
-            yield from self._parse_file(file)
+        return Collection(Collection.deduplicate_articles(self.iter_articles()))
+
+    def iter_articles(self) -> Iterable[Article]:
+        """Yield the articles in the files one record at a time.
+
+        With more than one worker the records are parsed in a process pool,
+        the articles are yielded in the same order as the records.
+        """
+        records = (
+            record
+            for file in self._files
+            for record in self._records(file, memory_map=self._memory_map)
+        )
+        yield from parse_records(
+            self._parse_record, records, self._workers, self.reference_table
+        )
 
     @staticmethod
     def _find_volume_info(ref: str) -> tuple[dict[str, str], str]:
@@ -108,7 +132,7 @@ class ScopusRisSource(Source):
             raise MissingCriticalInformationError()
         return Article(
             label=scopusref,
-            ids=set() if doi is None else {f"doi:{doi}"},
+            ids=IdSet() if doi is None else IdSet((f"doi:{doi}",)),
             authors=[f"{first_name} {last_name.replace(' ', '').replace('.', '')}"],
             year=int(year),
             journal=(
@@ -122,13 +146,20 @@ class ScopusRisSource(Source):
         ).add_simple_id()
 
     @classmethod
-    def _parse_references(cls, refs: list[str]) -> list[Article]:
+    def _parse_references(
+        cls,
+        refs: list[str],
+        reference_table: ReferenceTable | None = None,
+    ) -> list[Article]:
         if not refs:
             return []
         result = []
         for ref in refs:
             try:
-                result.append(cls._article_form_reference(ref))
+                if reference_table is None:
+                    result.append(cls._article_form_reference(ref))
+                else:
+                    result.append(reference_table.get(ref, cls._article_form_reference))
             except (KeyError, IndexError, TypeError, ValueError):
                 logging.debug("Ignoring invalid reference %s", ref)
         return result
@@ -158,7 +189,11 @@ class ScopusRisSource(Source):
         return dict(parsed)
 
     @classmethod
-    def _article_from_record(cls, record: str) -> Article:
+    def _article_from_record(
+        cls,
+        record: str,
+        reference_table: ReferenceTable | None = None,
+    ) -> Article:
         data = cls._ris_to_dict(record)
         year = _int_or_nothing(data.get("PY", []))
         times_cited = _int_or_nothing(data.get("TC"))
@@ -170,7 +205,7 @@ class ScopusRisSource(Source):
         return (
             Article(
                 label=doi or "replaceme",
-                ids=set() if doi is None else {f"doi:{doi}"},
+                ids=IdSet() if doi is None else IdSet((f"doi:{doi}",)),
                 title=_joined(data.get("TI")),
                 authors=authors,
                 year=year,
@@ -180,7 +215,9 @@ class ScopusRisSource(Source):
                 page=_joined(data.get("SP")),
                 doi=doi,
                 keywords=data.get("KW", []),
-                references=cls._parse_references(data.get("N1:References", [])),
+                references=cls._parse_references(
+                    data.get("N1:References", []), reference_table
+                ),
                 sources={"scopus"},
                 extra=data,
                 times_cited=times_cited,
@@ -189,15 +226,30 @@ class ScopusRisSource(Source):
             .set_simple_label()
         )
 
-    @classmethod
-    def _parse_file(cls, file: TextIO) -> Iterable[Article]:
+    @staticmethod
+    def _records(file: TextIO, *, memory_map: bool = False) -> Iterable[str]:
+        if memory_map and can_memory_map(file):
+            # Every field ends up in `extra`, so records are decoded whole
+            for _, record in split_mapped_records(file, _RECORD_END):
+                yield record.decode(file.encoding).replace("\r\n", "\n")
+            return
+        if memory_map:
+            logger.debug("%r can't be memory mapped, reading it as text", file)
         if not _size(file):
             return
-        for item in file.read().split("\n\n"):
-            if item.isspace():
+        for item in split_records(file):
+            if not item or item.isspace():
                 continue
-            try:
-                article = cls._article_from_record(item.strip())
-                yield article
-            except MissingCriticalInformationError:
-                logger.info("Missing critical information for record %s", item)
+            yield item.strip()
+
+    @classmethod
+    def _parse_record(
+        cls,
+        record: str,
+        reference_table: ReferenceTable | None = None,
+    ) -> Article | None:
+        try:
+            return cls._article_from_record(record, reference_table)
+        except MissingCriticalInformationError:
+            logger.info("Missing critical information for record %s", record)
+            return None
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+
 from bibx.models.article import Article
 from bibx.models.collection import Collection
 
@@ -10,6 +12,10 @@ class SimpleSource(Source):
     def __init__(self, articles: list[Article]) -> None:
         self.articles = articles
 
+    def iter_articles(self) -> Iterable[Article]:
+        """Yield the articles in the list."""
+        yield from self.articles
+
     def build(self) -> Collection:
         """Build a collection of articles from a list of articles."""
-        return Collection(Collection.deduplicate_articles(self.articles))
+        return Collection(Collection.deduplicate_articles(self.iter_articles()))
@@ -2,23 +2,39 @@ import collections
 import functools
 import logging
 import re
-from collections.abc import Callable, Iterable, Mapping
+import string
+from collections.abc import Callable, ItemsView, Iterable, Iterator, Mapping
 from contextlib import suppress
 from dataclasses import dataclass
-from typing import Any, ClassVar, TextIO
+from typing import Any, ClassVar, NamedTuple, TextIO
 
 from bibx.exceptions import (
     InvalidIsiLineError,
     InvalidIsiReferenceError,
     MissingCriticalInformationError,
 )
-from bibx.models.article import Article
+from bibx.models.article import Article, IdSet
 from bibx.models.collection import Collection
+from bibx.provenance import Provenance, SourceFile, SourceSpan, iter_lines
+from bibx.utils import can_memory_map, split_mapped_records, split_records
 
-from .base import Source
+from .base import Source, parse_records
+from .reference_table import ReferenceTable
 
 logger = logging.getLogger(__name__)
 
+_IGNORED_TAGS = frozenset(("FN", "VR", "ER"))
+
+_TAG_CHARS = frozenset(string.ascii_uppercase + string.digits)
+_TAG_LENGTH = 2
+_CONTINUATION = "  "
+_TAGS_BY_BYTES = {
+    f"{a}{b}".encode(): f"{a}{b}"
+    for a in sorted(_TAG_CHARS)
+    for b in sorted(_TAG_CHARS)
+}
+_RECORD_END = b"ER"
+
 
 def _joined(values: list[str], separator: str = " ") -> str:
     return separator.join(value.strip() for value in values)
@@ -57,6 +73,119 @@ class _IsiField:
         return self.parser(value)
 
 
+def _tags_by_alias(fields: Mapping[str, _IsiField]) -> dict[str, tuple[str, ...]]:
+    tags: dict[str, tuple[str, ...]] = {}
+    for field in fields.values():
+        for alias in field.aliases:
+            tags[alias] = (*tags.get(alias, ()), field.key)
+    return tags
+
+
+class _IsiRecord(Mapping[str, Any]):
+    """Read only mapping over the raw lines of an ISI record.
+
+    Each field is parsed the first time it is read and the parsed value
+    replaces the raw lines. Aliases from `WosSource.FIELDS` resolve to their
+    tag instead of holding a copy of the value, but the keys are the same as
+    if every alias had been stored.
+    """
+
+    __slots__ = ("_encoding", "_fields")
+
+    def __init__(
+        self,
+        raw: Mapping[str, list[str]] | Mapping[str, list[str | bytes]],
+        encoding: str | None = None,
+    ) -> None:
+        # Raw lines are kept as tuples, parsers never return tuples. Lines
+        # read from a memory mapped file stay as bytes until they're parsed.
+        self._encoding = encoding
+        self._fields: dict[str, Any] = {
+            tag: tuple(lines) for tag, lines in raw.items() if tag not in _IGNORED_TAGS
+        }
+
+    def _tag(self, key: str) -> str | None:
+        fields = self._fields
+        if key in fields:
+            return key
+        tags = WosSource._TAGS_BY_ALIAS.get(key)
+        if tags is None:
+            return None
+        if len(tags) == 1:
+            return tags[0] if tags[0] in fields else None
+        present = [tag for tag in tags if tag in fields]
+        if not present:
+            return None
+        # The last field in the record wins, like it did in a plain dict
+        order = list(fields)
+        return max(present, key=order.index)
+
+    def _value(self, tag: str) -> str | int | list[str]:
+        value = self._fields[tag]
+        if type(value) is tuple:
+            lines = list(value)
+            if self._encoding is not None:
+                lines = [
+                    line.decode(self._encoding) if type(line) is bytes else line
+                    for line in lines
+                ]
+            value = self._fields[tag] = WosSource._parse(tag, lines)
+        return value
+
+    def __getitem__(self, key: str) -> str | int | list[str]:
+        """Return the parsed value of a tag or one of its aliases."""
+        tag = self._tag(key)
+        if tag is None:
+            raise KeyError(key)
+        return self._value(tag)
+
+    def get(self, key: str, default: Any = None) -> Any:  # noqa: ANN401
+        """Return the parsed value of a tag or alias, or the default."""
+        tag = self._tag(key)
+        return default if tag is None else self._value(tag)
+
+    def __contains__(self, key: object) -> bool:
+        """Check for a tag or alias without parsing it."""
+        return isinstance(key, str) and self._tag(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over every tag followed by its aliases."""
+        seen = set()
+        for tag in self._fields:
+            field = WosSource.FIELDS.get(tag)
+            for key in (tag, *field.aliases) if field else (tag,):
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self) -> int:
+        """Return the number of tags and aliases."""
+        return sum(1 for _ in self)
+
+    def items(self) -> ItemsView[str, Any]:
+        """Return every tag and alias with its value, parsing each tag once."""
+        fields = self._fields
+        items: dict[str, Any] = {}
+        for tag in fields:
+            value = items[tag] = self._value(tag)
+            field = WosSource.FIELDS.get(tag)
+            if field is None:
+                continue
+            for alias in field.aliases:
+                # Later tags win like in `_tag`, but keep the first position
+                if alias not in fields:
+                    items[alias] = value
+        return items.items()
+
+
+class _Record(NamedTuple):
+    """Text of a record, or its bytes and encoding if the file was mapped."""
+
+    data: str | bytes
+    span: SourceSpan | None = None
+    encoding: str | None = None
+
+
 class WosSource(Source):
     """Builder for collections of articles from Web of Science (WoS) ISI files."""
 
@@ -252,61 +381,202 @@ class WosSource(Source):
             ["total_times_cited_count", "times_cited"],
         ),
     }
+    _TAGS_BY_ALIAS: ClassVar = _tags_by_alias(FIELDS)
 
-    def __init__(self, *isi_files: TextIO) -> None:
+    def __init__(
+        self,
+        *isi_files: TextIO,
+        workers: int = 1,
+        reference_table: ReferenceTable | None = None,
+        provenance: Provenance = Provenance.TEXT,
+        memory_map: bool = False,
+    ) -> None:
         self._files = isi_files
+        self._workers = workers
+        self._provenance = provenance
+        self._memory_map = memory_map
+        self._handle: SourceFile | None = None
+        self.reference_table = (
+            ReferenceTable() if reference_table is None else reference_table
+        )
         for file in self._files:
             file.seek(0)
 
     def build(self) -> Collection:
         """Build a collection of articles from Web of Science (WoS) ISI files."""
-        articles = self._get_articles_from_files()
-        return Collection(Collection.deduplicate_articles(list(articles)))
+        return Collection(Collection.deduplicate_articles(self.iter_articles()))
+
+    def iter_articles(self) -> Iterable[Article]:
+        """Yield the articles in the files one record at a time.
 
-    def _get_articles_as_str_from_files(self) -> Iterable[str]:
+        With more than one worker the records are parsed in a process pool,
+        the articles are yielded in the same order as the records.
+        """
+        yield from parse_records(
+            self._parse_record,
+            self._get_records_from_files(),
+            self._workers,
+            self.reference_table,
+        )
+
+    def _get_records_from_files(self) -> Iterable[_Record]:
         for file in self._files:
-            articles_as_str = file.read().split("\n\n")
-            for article_as_str in articles_as_str:
-                if article_as_str.strip() not in ("ER", "EF") and article_as_str:
-                    # Strip `\n` at the end of the article so we don't trip
-                    yield article_as_str.strip()
-
-    def _get_articles_from_files(self) -> Iterable[Article]:
-        for article_as_str in self._get_articles_as_str_from_files():
-            with suppress(MissingCriticalInformationError):
-                article = self._parse_article_from_str(article_as_str)
-                yield article
+            handle = None
+            if self._provenance is Provenance.OFFSET:
+                # Held by the source while the file is read, so spans back
+                # from the workers find it, and by its records after that
+                handle = SourceFile(file)
+            self._handle = handle
+            if self._memory_map and can_memory_map(file):
+                yield from self._get_mapped_records(file, handle)
+                continue
+            if self._memory_map:
+                logger.debug("%r can't be memory mapped, reading it as text", file)
+            yield from self._get_records(file, handle)
+
+    @classmethod
+    def _get_records(
+        cls, file: TextIO, handle: SourceFile | None = None
+    ) -> Iterable[_Record]:
+        if handle is not None:
+            yield from cls._get_records_with_spans(file, handle)
+            return
+        for record in split_records(file):
+            # Strip `\n` at the end of the article so we don't trip
+            article_as_str = record.strip()
+            if article_as_str and article_as_str not in ("ER", "EF"):
+                yield _Record(article_as_str)
+
+    @staticmethod
+    def _get_mapped_records(
+        file: TextIO, handle: SourceFile | None = None
+    ) -> Iterable[_Record]:
+        for offset, record in split_mapped_records(file, _RECORD_END):
+            if record in (b"ER", b"EF"):
+                continue
+            span = None
+            if handle is not None:
+                span = SourceSpan(handle, offset, len(record))
+            yield _Record(record, span, file.encoding)
+
+    @staticmethod
+    def _get_records_with_spans(file: TextIO, handle: SourceFile) -> Iterable[_Record]:
+        lines: list[str] = []
+        start = end = 0
+        for line_start, line_end, line in iter_lines(file):
+            if line != "\n":
+                if not lines:
+                    start = line_start
+                lines.append(line)
+                end = line_end
+                continue
+            article_as_str = "".join(lines).strip()
+            lines = []
+            if article_as_str and article_as_str not in ("ER", "EF"):
+                yield _Record(article_as_str, SourceSpan(handle, start, end - start))
+        article_as_str = "".join(lines).strip()
+        if article_as_str and article_as_str not in ("ER", "EF"):
+            yield _Record(article_as_str, SourceSpan(handle, start, end - start))
+
+    @classmethod
+    def _parse_record(
+        cls,
+        record: _Record,
+        reference_table: ReferenceTable | None = None,
+    ) -> Article | None:
+        data, span, encoding = record
+        with suppress(MissingCriticalInformationError):
+            if isinstance(data, bytes):
+                return cls._parse_article_from_bytes(
+                    data, encoding or "utf-8", reference_table, span
+                )
+            return cls._parse_article_from_str(data, reference_table, span)
+        return None
 
     @classmethod
     def _get_articles_from_references(
-        cls, references: list[str] | None
+        cls,
+        references: list[str] | None,
+        reference_table: ReferenceTable | None = None,
     ) -> Iterable[Article]:
         if not references:
             return
         for ref_str in references:
             with suppress(InvalidIsiReferenceError):
-                yield cls._parse_reference_from_str(ref_str)
+                if reference_table is None:
+                    yield cls._parse_reference_from_str(ref_str)
+                else:
+                    yield reference_table.get(ref_str, cls._parse_reference_from_str)
 
     @classmethod
-    def _parse_article_from_str(cls, article_as_str: str) -> Article:
+    def _parse_article_from_str(
+        cls,
+        article_as_str: str,
+        reference_table: ReferenceTable | None = None,
+        span: SourceSpan | None = None,
+    ) -> Article:
         article_data: dict[str, list[str]] = collections.defaultdict(list)
         article_data.setdefault("CR", [])
         field = None
         for line in article_as_str.split("\n"):
-            match = cls.ISI_LINE_PATTERN.match(line)
-            if not match:
-                raise InvalidIsiLineError(line)
-            parsed = match.groupdict()
-            field = parsed.get("field") or field
-            if not field or "value" not in parsed or parsed["value"] is None:
+            tag, value = cls._tokenize_line(line)
+            field = tag or field
+            if not field or value is None:
                 continue
-            article_data[field].append(parsed["value"])
-        processed = cls._parse_all(dict(article_data))
+            article_data[field].append(value)
+        return cls._article_from_data(
+            cls._parse_all(article_data),
+            article_as_str if span is None else span,
+            reference_table,
+        )
+
+    @classmethod
+    def _parse_article_from_bytes(
+        cls,
+        record: bytes,
+        encoding: str,
+        reference_table: ReferenceTable | None = None,
+        span: SourceSpan | None = None,
+    ) -> Article:
+        article_data: dict[str, list[str | bytes]] = {"CR": []}
+        field = values = None
+        if b"\r" in record:
+            record = record.replace(b"\r\n", b"\n")
+        for line in record.split(b"\n"):
+            # Same as `_tokenize_line`, but values stay as bytes
+            value: str | bytes | None
+            if line[2:3] == b" " and line[:2] in _TAGS_BY_BYTES:
+                tag, value = _TAGS_BY_BYTES[line[:2]], line[3:]
+            elif line[:3] == b"   " and line[3:4] not in (b"", b" "):
+                tag, value = None, line[3:]
+            else:
+                tag, value = cls._tokenize_line(line.decode(encoding))
+            if tag is not None:
+                field, values = tag, article_data.get(tag)
+            if field is None or value is None:
+                continue
+            if values is None:
+                values = article_data[field] = []
+            values.append(value)
+        source: str | SourceSpan | None = span
+        if source is None:
+            source = record.decode(encoding).replace("\r\n", "\n")
+        return cls._article_from_data(
+            _IsiRecord(article_data, encoding), source, reference_table
+        )
+
+    @classmethod
+    def _article_from_data(
+        cls,
+        processed: Mapping[str, Any],
+        source: str | SourceSpan,
+        reference_table: ReferenceTable | None = None,
+    ) -> Article:
         doi = processed.get("DOI")
         return (
             Article(
                 label=doi or "replaceme",
-                ids=set() if doi is None else {f"doi:{doi}"},
+                ids=IdSet() if doi is None else IdSet((f"doi:{doi}",)),
                 authors=processed.get("authors", []),
                 year=processed.get("year"),
                 title=processed.get("title"),
@@ -317,16 +587,38 @@ class WosSource(Source):
                 doi=doi,
                 times_cited=processed.get("times_cited"),
                 references=list(
-                    cls._get_articles_from_references(processed.get("references"))
+                    cls._get_articles_from_references(
+                        processed.get("references"), reference_table
+                    )
                 ),
                 keywords=processed.get("keywords", []),
                 extra=processed,
-                sources={article_as_str},
+                sources={source},
             )
             .add_simple_id()
             .set_simple_label()
         )
 
+    @classmethod
+    def _tokenize_line(cls, line: str) -> tuple[str | None, str | None]:
+        # Tags always sit in the first two columns followed by a space, and
+        # continuation lines start with three spaces, so most lines can be
+        # sliced by column. Anything else (BOM, `null` prefixes, extra
+        # indentation) goes through the full pattern.
+        if line[2:3] == " ":
+            if line[0] in _TAG_CHARS and line[1] in _TAG_CHARS:
+                return line[:2], line[3:]
+            if line[:2] == _CONTINUATION and line[3:4] not in ("", " "):
+                return None, line[3:]
+        elif (
+            len(line) == _TAG_LENGTH and line[0] in _TAG_CHARS and line[1] in _TAG_CHARS
+        ):
+            return line, None
+        match = cls.ISI_LINE_PATTERN.match(line)
+        if not match:
+            raise InvalidIsiLineError(line)
+        return match.group("field"), match.group("value")
+
     @classmethod
     def _parse_reference_from_str(cls, reference: str) -> Article:
         match = cls.ISI_CITATION_PATTERN.match(reference)
@@ -337,7 +629,7 @@ class WosSource(Source):
         doi = processed.get("DOI")
         article = Article(
             label=reference,
-            ids=set() if doi is None else {f"doi:{doi}"},
+            ids=IdSet() if doi is None else IdSet((f"doi:{doi}",)),
             title=processed.get("title"),
             authors=processed.get("authors", []),
             # FIXME: Year is required here
@@ -355,21 +647,12 @@ class WosSource(Source):
 
     @classmethod
     def _parse_all(cls, article_data: dict[str, list[str]]) -> Mapping[str, Any]:
-        processed_data = {}
-        for key, values in article_data.items():
-            parsed_values_dict = cls._parse(key, values)
-            processed_data.update(parsed_values_dict)
-        return processed_data
+        return _IsiRecord(article_data)
 
     @classmethod
-    def _parse(cls, key: str, value: list[str]) -> dict:
-        if key in {"FN", "VR", "ER"}:
-            return {}
-
+    def _parse(cls, key: str, value: list[str]) -> str | int | list[str]:
         if key in cls.FIELDS:
-            field = cls.FIELDS[key]
-            parsed_value = field.parse(value)
-            return dict.fromkeys([field.key, *field.aliases], parsed_value)
+            return cls.FIELDS[key].parse(value)
 
         logger.debug("Found an unknown field with key %s and value %s", key, value)
-        return {key: _ident(value)}
+        return _ident(value)
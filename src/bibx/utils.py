@@ -1,10 +1,128 @@
-from collections.abc import Generator
-from typing import TypeVar
+import mmap
+import os
+import re
+import stat
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, TypeVar
 
 T = TypeVar("T")
+R = TypeVar("R")
+
+_BATCH_SIZE = 256
+_PENDING_BATCHES_PER_WORKER = 2
+_NON_SPACE = re.compile(rb"\S")
 
 
 def chunks(lst: list[T], n: int) -> Generator[list[T], None, None]:
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
         yield lst[i : i + n]
+
+
+def split_records(lines: Iterable[str]) -> Generator[str, None, None]:
+    """Yield the records separated by empty lines from an iterable of lines.
+
+    Only one record is kept in memory at a time.
+    """
+    record: list[str] = []
+    for line in lines:
+        if line == "\n":
+            yield "".join(record)
+            record = []
+            continue
+        record.append(line)
+    if record:
+        yield "".join(record)
+
+
+def can_memory_map(file: IO) -> bool:
+    """Check if a file is backed by a file descriptor that can be mapped."""
+    try:
+        return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def split_mapped_records(
+    file: IO, end: bytes
+) -> Generator[tuple[int, bytes], None, None]:
+    """Yield the records of a file whose last line starts with `end`.
+
+    The file is memory mapped and scanned as bytes, so nothing is decoded
+    and only the record being yielded is copied. Each record comes with
+    its offset in bytes and without the whitespace around it.
+
+    :param file: a file that can be memory mapped.
+    :param end: start of the line that finishes a record, e.g. `b"ER"`.
+    :return: a generator of `(offset, record)` tuples.
+    """
+    fileno = file.fileno()
+    if not os.fstat(fileno).st_size:
+        return
+    marker = b"\n" + end
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while (found := data.find(marker, start)) != -1:
+            line_end = data.find(b"\n", found + 1)
+            stop = len(data) if line_end == -1 else line_end + 1
+            yield from _stripped_record(data, start, stop)
+            start = stop
+        yield from _stripped_record(data, start, len(data))
+
+
+def _stripped_record(
+    data: mmap.mmap, start: int, end: int
+) -> Generator[tuple[int, bytes], None, None]:
+    first = _NON_SPACE.search(data, start, end)
+    if first is not None:
+        yield first.start(), data[first.start() : end].rstrip()
+
+
+def batched(items: Iterable[T], n: int) -> Generator[list[T], None, None]:
+    """Yield successive n-sized lists from any iterable."""
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _apply(func: Callable[[T], R], batch: list[T]) -> list[R]:
+    return [func(item) for item in batch]
+
+
+def parallel_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = 1,
+    batch_size: int = _BATCH_SIZE,
+) -> Generator[R, None, None]:
+    """Map a function over the items using a pool of worker processes.
+
+    The items are sent to the workers in batches and the results are yielded
+    in the same order as the items. Only a bounded number of batches are in
+    flight at any time, so the items can come from a stream. With one worker
+    everything runs in the current process.
+
+    :param func: a picklable function, e.g. a module level function.
+    :param items: the items to process.
+    :param workers: number of worker processes.
+    :param batch_size: number of items sent to a worker at once.
+    :return: a generator with the results.
+    """
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[list[R]]] = deque()
+        for batch in batched(items, batch_size):
+            pending.append(executor.submit(_apply, func, batch))
+            if len(pending) >= _PENDING_BATCHES_PER_WORKER * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
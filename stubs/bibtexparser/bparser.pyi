@@ -1,2 +1,8 @@
 class BibDatabase:
     entries: list[dict]
+
+class BibTexParser:
+    bib_database: BibDatabase
+    expect_multiple_parse: bool
+
+    def parse(self, bibtex_str: str, partial: bool = False) -> BibDatabase: ...
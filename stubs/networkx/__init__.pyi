@@ -1,19 +1,25 @@
 from collections.abc import Iterable, Iterator
 
 from _typeshed import Self
-from networkx.classes.reportviews import NodeView
+from networkx.classes.reportviews import EdgeView, NodeView
 from pyparsing.helpers import Union
 
 __version__: str
 
+class NetworkXException(Exception): ...  # noqa: N818
+class NetworkXUnfeasible(NetworkXException): ...
+
 class Graph:
     nodes: NodeView
+    edges: EdgeView
+    graph: dict
     def subgraph(self: Self, nodes: Iterable) -> Self: ...
     def copy(self: Self) -> Self: ...
     def add_node(
         self, node: str, **kwargs: Union[int, str, list[str], None]
     ) -> None: ...
     def add_edge(self, u: str, v: str, **kwargs: int) -> None: ...
+    def add_nodes_from(self, nodes: Iterable) -> None: ...
     def add_edges_from(self, edges: Iterable) -> None: ...
     def remove_nodes_from(self, edges: Iterable) -> None: ...
     def remove_edges_from(self, edges: Iterable) -> None: ...
@@ -0,0 +1,5 @@
+from collections.abc import Iterable
+
+from networkx import Graph
+
+def label_propagation_communities(g: Graph) -> Iterable[set]: ...
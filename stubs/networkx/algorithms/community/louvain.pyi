@@ -1,3 +1,10 @@
 from networkx import Graph
 
-def louvain_communities(g: Graph) -> list[set]: ...
+def louvain_communities(
+    g: Graph,
+    weight: str | None = ...,
+    resolution: float = ...,
+    threshold: float = ...,
+    max_level: int | None = ...,
+    seed: int | None = ...,
+) -> list[set]: ...
@@ -4,3 +4,9 @@ class NodeView(Mapping, Set):
     def __getitem__(self, key: str, /) -> dict: ...
     def __iter__(self) -> Iterator[str]: ...
     def __len__(self) -> int: ...
+
+class EdgeView(Set):
+    def __call__(self, data: bool = ...) -> Iterator[tuple]: ...
+    def __contains__(self, edge: object, /) -> bool: ...
+    def __iter__(self) -> Iterator[tuple[str, str]]: ...
+    def __len__(self) -> int: ...
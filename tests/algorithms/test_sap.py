@@ -1,6 +1,17 @@
+import math
+
 import networkx as nx
 
-from bibx.algorithms.sap import Sap
+from bibx import Article, read_wos
+from bibx.algorithms.sap import (
+    Sap,
+    SapBackend,
+    SapCommunities,
+    SapNumeric,
+    SapSession,
+)
+
+LABELS = ("root", "leaf", "trunk", "_sap")
 
 
 def create_toy_graph() -> nx.DiGraph:
@@ -47,3 +58,202 @@ def test_sap() -> None:
     assert g.nodes["d"]["leaf"] == 0
     assert g.nodes["d"]["trunk"] > 0
     assert g.nodes["d"]["root"] == 0
+
+
+def test_sap_in_place() -> None:
+    """Test the tree can label the given graph instead of a copy."""
+    g = create_toy_graph()
+    expected = Sap().tree(g)
+    assert "root" not in g.nodes["a"]
+    tree = Sap().tree(g, in_place=True)
+    assert tree is g
+    assert _labels(tree) == _labels(expected)
+
+
+def _labels(g: nx.DiGraph) -> dict[str, tuple[int, ...]]:
+    return {n: tuple(d[label] for label in LABELS) for n, d in g.nodes.items()}
+
+
+def test_sap_backends_toy_graph() -> None:
+    """Test both backends label the toy graph the same."""
+    g = create_toy_graph()
+    expected = Sap().tree(g)
+    tree = Sap(backend=SapBackend.ARRAYS).tree(g)
+    assert _labels(tree) == _labels(expected)
+
+
+def test_sap_backends_wos() -> None:
+    """Test both backends label the WoS example the same."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    g = Sap.clean_graph(Sap.create_graph(collection))
+    for limit in (10, 50):
+        networkx = Sap(max_roots=limit, max_leaves=limit, max_trunk=limit)
+        arrays = Sap(
+            max_roots=limit,
+            max_leaves=limit,
+            max_trunk=limit,
+            backend=SapBackend.ARRAYS,
+        )
+        assert _labels(arrays.tree(g)) == _labels(networkx.tree(g))
+
+
+def test_sap_numeric_modes() -> None:
+    """Test approximate path counts label the same nodes as exact ones."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    g = Sap.clean_graph(Sap.create_graph(collection))
+    for backend in SapBackend:
+        exact = Sap(backend=backend).tree(g)
+        for numeric, scale in (
+            (SapNumeric.FLOAT, float),
+            (SapNumeric.LOG, math.log1p),
+        ):
+            tree = Sap(backend=backend, numeric=numeric).tree(g)
+            for n, d in tree.nodes.items():
+                # Roots are chosen by their in degree, it is never scaled
+                assert d["root"] == exact.nodes[n]["root"]
+                for label in ("leaf", "trunk", "_sap"):
+                    expected = scale(exact.nodes[n][label])
+                    assert math.isclose(d[label], expected, rel_tol=1e-9)
+
+
+def test_sap_float_falls_back_to_log() -> None:
+    """Test that counts too large for floats are counted as logarithms."""
+    # Every level cites both nodes of the next one, so paths double per level
+    g = nx.DiGraph()
+    for level in range(1030):
+        for a in range(2):
+            g.add_node((level, a), year=2000)
+            for b in range(2):
+                g.add_edge((level, a), (level + 1, b))
+    for b in range(2):
+        g.add_node((1030, b), year=2000)
+    for backend in SapBackend:
+        log = Sap(backend=backend, numeric=SapNumeric.LOG, seed=1).tree(g)
+        tree = Sap(backend=backend, numeric=SapNumeric.FLOAT, seed=1).tree(g)
+        assert tree.graph["numeric"] == SapNumeric.LOG
+        assert dict(tree.nodes.items()) == dict(log.nodes.items())
+        assert all(math.isfinite(d["_sap"]) for _, d in tree.nodes.items())
+        session = SapSession(g, clean=False)
+        again = session.tree(Sap(backend=backend, numeric=SapNumeric.FLOAT, seed=1))
+        assert dict(again.nodes.items()) == dict(log.nodes.items())
+
+
+def test_sap_branches() -> None:
+    """Test the branches can be seeded, reduced and found in other ways."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    g = Sap.clean_graph(Sap.create_graph(collection))
+
+    def branches(tree: nx.DiGraph) -> dict[str, int]:
+        return {n: d["branch"] for n, d in tree.nodes.items() if d["branch"]}
+
+    s = Sap(seed=7)
+    seeded = branches(s.tree(g))
+    assert seeded
+    assert branches(s.tree(g)) == seeded
+    assert set(s.timings) == {"labels", "communities"}
+
+    reduced = Sap(seed=7, min_branch_sap=1).tree(g)
+    assert branches(reduced)
+    assert all(reduced.nodes[n]["_sap"] > 0 for n in branches(reduced))
+
+    s = Sap(communities=SapCommunities.LABEL_PROPAGATION)
+    assert branches(s.tree(g)) == branches(s.tree(g))
+
+
+def test_sap_session() -> None:
+    """Test a session gives the trees of the sap with the same parameters."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    graph = Sap.create_graph(collection)
+    g = Sap.clean_graph(graph)
+    for backend in SapBackend:
+        session = SapSession(graph)
+        assert list(session.graph) == list(g)
+        for max_roots, max_trunk in ((20, 20), (20, 5), (10, 5)):
+            s = Sap(max_roots=max_roots, max_trunk=max_trunk, backend=backend, seed=7)
+            expected = s.tree(g)
+            tree = session.tree(s)
+            assert dict(tree.nodes.items()) == dict(expected.nodes.items())
+        assert "root" not in session.graph.nodes[next(iter(g))]
+        # The connections are kept once for each number of roots
+        assert len(session._roots) == len(session._leaves) == 2  # noqa: PLR2004
+        # The communities of the whole graph are found once
+        assert "communities" not in s.timings
+
+
+def test_sap_session_communities_parameters() -> None:
+    """Test a session doesn't share communities found with other parameters."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    graph = Sap.create_graph(collection)
+    g = Sap.clean_graph(graph)
+    session = SapSession(graph)
+    for seed, resolution in ((7, 1), (8, 1), (7, 2)):
+        s = Sap(backend=SapBackend.ARRAYS, seed=seed, resolution=resolution)
+        tree = session.tree(s)
+        assert "communities" in s.timings
+        expected = s.tree(g)
+        assert dict(tree.nodes.items()) == dict(expected.nodes.items())
+
+
+def test_sap_lean_graph() -> None:
+    """Test lean graphs give the same tree once joined with their metadata."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    full = Sap.create_graph(collection)
+    lean = Sap.create_graph(collection, lean=True)
+    assert all(list(d) == ["year"] for _, d in lean.nodes.items())
+
+    cleaned = Sap.clean_graph(lean)
+    assert list(cleaned.graph["metadata"]) == list(cleaned)
+
+    expected = Sap(seed=7).tree(Sap.clean_graph(full))
+    tree = Sap.join_metadata(Sap(seed=7).tree(cleaned))
+    assert "metadata" not in tree.graph
+    assert [list(d.items()) for _, d in tree.nodes.items()] == [
+        list(d.items()) for _, d in expected.nodes.items()
+    ]
+
+
+def test_sap_create_clean_graph() -> None:
+    """Test the cleaned graph can be built without building the full graph."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+
+    def snapshot(g: nx.DiGraph) -> tuple[list, list, list]:
+        return (
+            [(n, list(d.items())) for n, d in g.nodes.items()],
+            list(g.edges),
+            [list(g.predecessors(n)) for n in g],
+        )
+
+    for lean in (False, True):
+        expected = Sap.clean_graph(Sap.create_graph(collection, lean=lean))
+        g = Sap.create_clean_graph(collection, lean=lean)
+        assert snapshot(g) == snapshot(expected)
+        assert g.graph == expected.graph
+
+
+def test_sap_graph_skips_articles_without_ids() -> None:
+    """Test references without ids are left out of the graphs."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    expected = Sap.create_graph(collection)
+    collection.articles[0].references.append(Article(label="anonymous", ids=set()))
+    g = Sap.create_graph(collection)
+    assert list(g) == list(expected)
+    assert list(Sap.create_clean_graph(collection)) == list(Sap.clean_graph(g))
+
+
+def test_sap_graphs_follow_changes_to_references() -> None:
+    """Test that the graphs see references added after an earlier graph."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as f:
+        collection = read_wos(f)
+    Sap.create_graph(collection)
+    article = collection.articles[0]
+    article.references.append(Article(label="new", ids={"doi:new"}))
+    assert Sap.create_graph(collection).has_edge(article.key, "doi:new")
+    assert "doi:new" in collection.to_csr().keys
@@ -0,0 +1,23 @@
+from itertools import pairwise
+
+from bibx.algorithms.union_find import UnionFind
+
+
+def test_union_find_joins_sets() -> None:
+    """Test that elements joined directly or through others share a root."""
+    sets = UnionFind()
+    a, b, c, d = (sets.add() for _ in range(4))
+    sets.union(a, b)
+    sets.union(c, b)
+    assert sets.find(a) == sets.find(c)
+    assert sets.find(d) == d
+    assert len(set(sets.roots())) == 2  # noqa: PLR2004
+
+
+def test_union_find_long_chains() -> None:
+    """Test that a long run of unions ends in a single set."""
+    sets = UnionFind()
+    elements = [sets.add() for _ in range(10_000)]
+    for a, b in pairwise(elements):
+        sets.union(b, a)
+    assert set(sets.roots()) == {sets.find(0)}
@@ -1,6 +1,6 @@
 import io
 
-from bibx import read_scopus_bib
+from bibx import Provenance, read_scopus_bib
 
 
 def test_scopus_works() -> None:
@@ -92,3 +92,27 @@ source={Scopus},
     assert data.articles[0].times_cited == 12  # noqa: PLR2004
     assert data.articles[1].times_cited == 0
     assert len(list(data.citation_pairs)) == 29  # noqa: PLR2004
+
+
+def test_scopus_offset_provenance() -> None:
+    """Test that offset provenance points to the text of each entry."""
+    file = io.StringIO(
+        """@comment{exported from scopus}
+@ARTICLE{Doe2020,
+author={Doe, J.},
+title={A title},
+year={2020},
+}
+
+@ARTICLE{Roe2021,
+author={Roe, R.},
+year={2021},
+}
+"""
+    )
+    collection = read_scopus_bib(file, provenance=Provenance.OFFSET)
+    texts = sorted(str(s) for article in collection.articles for s in article.sources)
+    assert texts == [
+        "@ARTICLE{Doe2020,\nauthor={Doe, J.},\ntitle={A title},\nyear={2020},\n}",
+        "@ARTICLE{Roe2021,\nauthor={Roe, R.},\nyear={2021},\n}",
+    ]
@@ -46,3 +46,11 @@ ER  -
     assert article.year == 2020  # noqa: PLR2004
     assert len(list(data.citation_pairs)) == 10  # noqa: PLR2004
     assert article.times_cited is None
+
+
+def test_scopus_memory_map() -> None:
+    """Test that the memory mapped reader finds the same articles."""
+    with open("docs/examples/scopus.ris") as file:
+        expected = read_scopus_ris(file)
+        mapped = read_scopus_ris(file, memory_map=True)
+    assert [a.info() for a in mapped.articles] == [a.info() for a in expected.articles]
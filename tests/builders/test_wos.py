@@ -1,6 +1,11 @@
+import gc
 import io
+import os
+import weakref
 
 from bibx import read_wos
+from bibx.provenance import Provenance, SourceSpan
+from bibx.sources.wos import WosSource
 
 
 def test_scopus_works() -> None:
@@ -117,3 +122,130 @@ ER
     )
     assert len(list(data.citation_pairs)) == 37  # noqa: PLR2004
     assert article.times_cited == 0
+
+
+def test_wos_iter_articles_streams_records() -> None:
+    """Test that the records are parsed as the file is read."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        articles = WosSource(file).iter_articles()
+        first = next(iter(articles))
+        assert not file.closed
+        assert file.buffer.tell() < os.path.getsize(file.name)
+        assert first.title is not None
+
+
+def test_wos_workers_keep_the_order() -> None:
+    """Test that parsing with a process pool gives the same articles."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        serial = [a.label for a in WosSource(file).iter_articles()]
+        parallel = [a.label for a in WosSource(file, workers=2).iter_articles()]
+    assert parallel == serial
+
+
+def test_wos_lines_with_prefixes() -> None:
+    """Test that lines with a BOM or a `null` prefix are still understood."""
+    file = io.StringIO(
+        "﻿FN Clarivate Analytics Web of Science\n"
+        "VR 1.0\n"
+        "PT J\n"
+        "AU Doe, J\n"
+        "nullTI A title\n"
+        "    that continues\n"
+        "PY 2020\n"
+        "ER\n"
+        "\n"
+        "EF\n"
+    )
+    (article,) = read_wos(file).articles
+    assert article.title == "A title that continues"
+    assert article.year == 2020  # noqa: PLR2004
+
+
+def test_wos_extra_resolves_aliases() -> None:
+    """Test that aliases in the extra mapping share the tag's value."""
+    with open("docs/examples/single-article.txt") as file:
+        (article,) = read_wos(file).articles
+    assert "abstract" in article.extra
+    assert article.extra["abstract"] is article.extra["AB"]
+    assert article.extra["DOI"] == article.doi
+    assert "not-a-field" not in article.extra
+    assert dict(article.extra)["publication_year"] == article.year
+
+
+def test_wos_references_are_shared() -> None:
+    """Test that the same cited reference is parsed once and shared."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        source = WosSource(file)
+        references = [r for a in source.iter_articles() for r in a.references]
+    assert source.reference_table.hits > 0
+    assert len({id(r) for r in references}) <= len(source.reference_table)
+    assert len(source.reference_table) < len(references)
+
+
+def test_wos_offset_provenance() -> None:
+    """Test that offset provenance reads back the same text as a copy."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        copies = list(WosSource(file).iter_articles())
+        spans = list(WosSource(file, provenance=Provenance.OFFSET).iter_articles())
+        for copy, span in zip(copies, spans, strict=True):
+            (text,) = copy.sources
+            (source,) = span.sources
+            assert isinstance(source, SourceSpan)
+            assert str(source) == text
+
+
+def test_wos_offset_provenance_with_workers() -> None:
+    """Test that spans parsed in worker processes still read their file."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        copies = list(WosSource(file).iter_articles())
+        source = WosSource(file, workers=2, provenance=Provenance.OFFSET)
+        spans = list(source.iter_articles())
+        for copy, span in zip(copies, spans, strict=True):
+            assert {str(source) for source in span.sources} == copy.sources
+
+
+def test_wos_offset_provenance_releases_the_file() -> None:
+    """Test that a file read with offsets is freed along with its articles."""
+    with open("docs/examples/single-article.txt") as file:
+        buffer = io.StringIO(file.read())
+    reference = weakref.ref(buffer)
+    collection = read_wos(buffer, provenance=Provenance.OFFSET)
+    del buffer
+    assert reference() is not None
+    assert str(next(iter(collection.articles[0].sources)))
+    del collection
+    gc.collect()
+    assert reference() is None
+
+
+def test_wos_offset_provenance_keeps_only_the_current_handle() -> None:
+    """Test that reading a source again drops the handles of earlier reads."""
+    with open("docs/examples/single-article.txt") as file:
+        source = WosSource(file, provenance=Provenance.OFFSET)
+        (article,) = source.iter_articles()
+        (span,) = article.sources
+        assert isinstance(span, SourceSpan)
+        handle = weakref.ref(span.file)
+        del article, span
+        list(source.iter_articles())
+        gc.collect()
+        assert handle() is None
+
+
+def test_wos_memory_map() -> None:
+    """Test that the memory mapped reader finds the same articles."""
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        expected = [a.info() for a in WosSource(file).iter_articles()]
+        mapped = list(WosSource(file, memory_map=True).iter_articles())
+    assert [a.info() for a in mapped] == expected
+    assert mapped[0].extra["title"] == mapped[0].title
+
+
+def test_wos_memory_map_falls_back_to_text() -> None:
+    """Test that files without a descriptor are read as text."""
+    with open("docs/examples/single-article.txt") as file:
+        expected = [a.info() for a in WosSource(file).iter_articles()]
+        file.seek(0)
+        buffer = io.StringIO(file.read())
+    mapped = WosSource(buffer, memory_map=True).iter_articles()
+    assert [a.info() for a in mapped] == expected
@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+
+from bibx.clients.cache import OpenAlexCache
+from bibx.clients.openalex import OpenAlexClient
+from bibx.clients.scheduler import RequestScheduler
+
+URL = "https://api.openalex.org/works"
+
+
+class Clock:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+class Response:
+    """The parts of a response the client uses."""
+
+    def __init__(self, data: dict) -> None:
+        self.status_code = 200
+        self.headers: dict[str, str] = {}
+        self.text = json.dumps(data)
+
+    def raise_for_status(self) -> None:
+        """Never fail."""
+
+    def json(self) -> dict:
+        """Return the parsed body."""
+        return json.loads(self.text)
+
+
+class Session:
+    """A session that answers id filters with the works it knows."""
+
+    def __init__(self, works: dict[str, dict]) -> None:
+        self.works = works
+        self.requests: list[dict] = []
+
+    def get(self, url: str, params: dict) -> Response:  # noqa: ARG002
+        """Record the request and answer it."""
+        self.requests.append(params)
+        ids = params["filter"].split(",")[0].removeprefix("ids.openalex:")
+        # Like the API, a work merged into another one is returned once
+        results = list(
+            {
+                self.works[id_]["id"]: self.works[id_]
+                for id_ in ids.split("|")
+                if id_ in self.works
+            }.values()
+        )
+        return Response(
+            {
+                "results": results,
+                "meta": {"count": len(results), "page": 1, "per_page": 80},
+            }
+        )
+
+
+def _work(key: str) -> dict:
+    return {
+        "id": f"https://openalex.org/{key}",
+        "ids": {"openalex": f"https://openalex.org/{key}"},
+        "authorships": [],
+        "cited_by_count": 2,
+        "keywords": [],
+        "referenced_works": [],
+        "biblio": {},
+    }
+
+
+def test_cache_keeps_responses(tmp_path: Path) -> None:
+    """Test that responses are found by their parameters in any order."""
+    cache = OpenAlexCache(tmp_path / "cache.sqlite")
+    cache.put_response(URL, {"page": 1, "filter": "x"}, "body")
+    cache.close()
+    cache = OpenAlexCache(tmp_path / "cache.sqlite")
+    assert cache.get_response(URL, {"filter": "x", "page": 1}) == "body"
+    assert cache.get_response(URL, {"filter": "x", "page": 2}) is None
+
+
+def test_cache_expires_entries() -> None:
+    """Test that works and missing works expire after their own ttl."""
+    clock = Clock()
+    cache = OpenAlexCache(ttl=10, negative_ttl=5, clock=clock)
+    cache.put_works({"https://openalex.org/w1": "work", "W2": None})
+    assert cache.get_works(["W1", "w2", "W3"]) == {"W1": "work", "W2": None}
+    clock.now = 6
+    assert cache.get_works(["W1", "W2"]) == {"W1": "work"}
+    clock.now = 11
+    assert cache.get_works(["W1", "W2"]) == {}
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """Test that the entries used last are kept when the cache is full."""
+    clock = Clock()
+    cache = OpenAlexCache(max_bytes=30, clock=clock)
+    for key in ("W1", "W2", "W3"):
+        clock.now += 1
+        cache.put_works({key: "x" * 8})
+    clock.now += 1
+    cache.get_works(["W1"])
+    clock.now += 1
+    cache.put_works({"W4": "x" * 8})
+    assert set(cache.get_works(["W1", "W2", "W3", "W4"])) == {"W1", "W3", "W4"}
+
+
+def test_cache_keeps_the_total_size() -> None:
+    """Test that the running size follows puts, replacements and deletes."""
+    cache = OpenAlexCache(ttl=None)
+    cache.put_works({"W1": "x" * 8, "W2": None})
+    cache.put_works({"W1": "x" * 4})
+    assert cache.size == 2 + 4 + 2
+    cache.put_response(URL, {"page": 1}, "body")
+    cache.clear()
+    assert cache.size == 0
+
+
+def test_client_only_requests_unknown_works() -> None:
+    """Test that a warm cache answers for found and missing works alike."""
+    session = Session({"W1": _work("W1"), "W2": _work("W2")})
+    client = OpenAlexClient(
+        cache=OpenAlexCache(), scheduler=RequestScheduler(rate=None)
+    )
+    client.session = session  # type: ignore[assignment]
+    works = client.list_articles_by_openalex_id(["W1", "W2", "W3"])
+    assert sorted(work.id for work in works) == [
+        "https://openalex.org/W1",
+        "https://openalex.org/W2",
+    ]
+    # The id without a work is asked for alone before it is kept as missing
+    assert len(session.requests) == 2  # noqa: PLR2004
+    again = client.list_articles_by_openalex_id(["W1", "W2", "W3"])
+    assert sorted(work.id for work in again) == sorted(work.id for work in works)
+    assert len(session.requests) == 2  # noqa: PLR2004
+    client.list_articles_by_openalex_id(["W3", "W4"])
+    assert session.requests[-1]["filter"].startswith("ids.openalex:W4,")
+
+
+def test_client_caches_merged_works_under_their_old_ids() -> None:
+    """Test that an id answered with another work is not kept as missing."""
+    session = Session({"W1": _work("W1"), "W5": _work("W1"), "W6": _work("W2")})
+    cache = OpenAlexCache()
+    client = OpenAlexClient(cache=cache, scheduler=RequestScheduler(rate=None))
+    client.session = session  # type: ignore[assignment]
+    works = client.list_articles_by_openalex_id(["W5", "W3", "W6"])
+    assert sorted(work.id for work in works) == [
+        "https://openalex.org/W1",
+        "https://openalex.org/W2",
+    ]
+    known = cache.get_works(["W1", "W2", "W3", "W5", "W6"])
+    assert known["W3"] is None
+    assert known["W5"] == known["W1"] is not None
+    assert known["W6"] == known["W2"] is not None
+    count = len(session.requests)
+    again = client.list_articles_by_openalex_id(["W1", "W5", "W3"])
+    assert [work.id for work in again] == ["https://openalex.org/W1"]
+    assert len(session.requests) == count
+    # Asked for along with the work it was merged into
+    cache.clear()
+    client.list_articles_by_openalex_id(["W1", "W5"])
+    assert cache.get_works(["W5"])["W5"] == known["W1"]
@@ -0,0 +1,106 @@
+import json
+
+from bibx.clients.cache import OpenAlexCache
+from bibx.clients.openalex import OpenAlexClient
+from bibx.clients.scheduler import RequestScheduler
+
+
+class Response:
+    """The parts of a response the client uses."""
+
+    def __init__(self, data: dict) -> None:
+        self.status_code = 200
+        self.headers: dict[str, str] = {}
+        self.text = json.dumps(data)
+
+    def raise_for_status(self) -> None:
+        """Never fail."""
+
+    def json(self) -> dict:
+        """Return the parsed body."""
+        return json.loads(self.text)
+
+
+class Session:
+    """A session that pages through a fixed number of works."""
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.requests: list[dict] = []
+
+    def get(self, url: str, params: dict) -> Response:  # noqa: ARG002
+        """Record the request and answer it with the page of a cursor."""
+        self.requests.append(params)
+        per_page = params["per_page"]
+        start = 0 if params["cursor"] == "*" else int(params["cursor"])
+        end = min(start + per_page, self.count)
+        results = [
+            {
+                "id": f"https://openalex.org/W{number}",
+                "ids": {},
+                "authorships": [],
+                "cited_by_count": 2,
+                "keywords": [],
+                "referenced_works": [],
+                "biblio": {},
+            }
+            for number in range(start, end)
+        ]
+        meta = {
+            "count": self.count,
+            "per_page": per_page,
+            "next_cursor": str(end) if end < self.count else None,
+        }
+        return Response({"results": results, "meta": meta})
+
+
+def _client(
+    count: int, cache: OpenAlexCache | None = None
+) -> tuple[OpenAlexClient, Session]:
+    client = OpenAlexClient(cache=cache, scheduler=RequestScheduler(rate=None))
+    session = Session(count)
+    client.session = session  # type: ignore[assignment]
+    return client, session
+
+
+def test_list_recent_articles_fetches_only_needed_pages() -> None:
+    """Test that a limit multiple of the page size fetches no extra page."""
+    client, session = _client(1000)
+    works = client.list_recent_articles("query", 400)
+    assert [work.id for work in works] == [
+        f"https://openalex.org/W{number}" for number in range(400)
+    ]
+    assert [params["cursor"] for params in session.requests] == ["*", "200"]
+
+
+def test_list_recent_articles_small_limit() -> None:
+    """Test that a limit under the page size asks for that many works."""
+    client, session = _client(1000)
+    assert len(client.list_recent_articles("query", 30)) == 30  # noqa: PLR2004
+    assert [params["per_page"] for params in session.requests] == [30]
+
+
+def test_list_recent_articles_follows_cursor() -> None:
+    """Test that large limits follow the cursor and stop."""
+    client, session = _client(20_000)
+    works = client.list_recent_articles("query", 10_250)
+    assert len({work.id for work in works}) == 10_250  # noqa: PLR2004
+    assert len(session.requests) == 52  # noqa: PLR2004
+    assert session.requests[-1]["per_page"] == 50  # noqa: PLR2004
+
+
+def test_iter_recent_articles_stops_when_exhausted() -> None:
+    """Test that the cursor stops when the API runs out of works."""
+    client, session = _client(450)
+    assert len(list(client.iter_recent_articles("query", 1000))) == 450  # noqa: PLR2004
+    assert [params["cursor"] for params in session.requests] == ["*", "200", "400"]
+
+
+def test_iter_recent_articles_does_not_cache_cursors() -> None:
+    """Test that the pages of a cursor are always requested."""
+    cache = OpenAlexCache()
+    client, session = _client(450, cache)
+    for _ in range(2):
+        assert len(list(client.iter_recent_articles("query", 300))) == 300  # noqa: PLR2004
+    assert len(session.requests) == 4  # noqa: PLR2004
+    assert len(cache) == 0
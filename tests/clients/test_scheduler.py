@@ -0,0 +1,135 @@
+import pytest
+import requests
+
+from bibx.clients.openalex import OpenAlexClient
+from bibx.clients.scheduler import RequestScheduler, TokenBucket
+from bibx.exceptions import OpenAlexError
+
+
+class Clock:
+    """A clock that moves only when something sleeps."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Move the clock forward."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Response:
+    """A response with a status and some headers."""
+
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None) -> None:
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = '{"results": [], "meta": {"count": 0, "per_page": 1}}'
+
+    def raise_for_status(self) -> None:
+        """Fail like requests does for error statuses."""
+        if self.status_code >= 400:  # noqa: PLR2004
+            raise requests.HTTPError(str(self.status_code))
+
+    def json(self) -> dict:
+        """Return an empty page."""
+        return {"results": [], "meta": {"count": 0, "per_page": 1}}
+
+
+def _replies(*responses: Response | Exception) -> list[Response | Exception]:
+    return list(responses)
+
+
+def _scheduler(clock: Clock, **kwargs: float) -> RequestScheduler:
+    return RequestScheduler(
+        clock=clock,
+        sleep=clock.sleep,
+        jitter=lambda low, high: (low + high) / 2,
+        **kwargs,  # type: ignore[arg-type]
+    )
+
+
+def _sender(replies: list[Response | Exception]) -> object:
+    def send() -> Response:
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    return send
+
+
+def test_token_bucket_spaces_out_calls() -> None:
+    """Test that calls past the burst wait for the rate."""
+    clock = Clock()
+    bucket = TokenBucket(4, 2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.sleeps == [0.25, 0.25]
+
+
+def test_scheduler_honors_retry_after() -> None:
+    """Test that a throttled request waits as long as the server asks."""
+    clock = Clock()
+    scheduler = _scheduler(clock, rate=0)
+    replies = _replies(Response(429, {"Retry-After": "3"}), Response(200))
+    response = scheduler.send(_sender(replies))  # type: ignore[arg-type]
+    assert response.status_code == 200  # noqa: PLR2004
+    assert clock.sleeps == [3]
+    assert scheduler.concurrency == 2  # noqa: PLR2004
+
+
+def test_scheduler_backs_off_exponentially() -> None:
+    """Test that transient errors are retried with growing waits."""
+    clock = Clock()
+    scheduler = _scheduler(clock, rate=0, max_retries=3, backoff=1)
+    replies = _replies(
+        Response(503), requests.ConnectionError(), Response(502), Response(503)
+    )
+    response = scheduler.send(_sender(replies))  # type: ignore[arg-type]
+    assert response.status_code == 503  # noqa: PLR2004
+    assert clock.sleeps == [0.5, 1, 2]
+
+
+def test_scheduler_grows_concurrency_back() -> None:
+    """Test that concurrency is halved on throttling and grows on success."""
+    clock = Clock()
+    scheduler = _scheduler(clock, rate=0, max_retries=1, max_concurrency=4)
+    replies = _replies(Response(429), Response(429), *(Response(200) for _ in range(3)))
+    scheduler.send(_sender(replies))  # type: ignore[arg-type]
+    assert scheduler.concurrency == 1
+    for _ in range(3):
+        scheduler.send(_sender(replies))  # type: ignore[arg-type]
+    assert scheduler.concurrency == 2  # noqa: PLR2004
+
+
+def test_scheduler_frees_slots_on_other_errors() -> None:
+    """Test that errors that are not retried don't keep a slot taken."""
+    clock = Clock()
+    scheduler = _scheduler(clock, rate=0, max_concurrency=2)
+    replies = _replies(
+        requests.exceptions.ChunkedEncodingError(),
+        requests.TooManyRedirects(),
+        Response(200),
+    )
+    for _ in range(2):
+        with pytest.raises(requests.RequestException):
+            scheduler.send(_sender(replies))  # type: ignore[arg-type]
+    assert clock.sleeps == []
+    response = scheduler.send(_sender(replies))  # type: ignore[arg-type]
+    assert response.status_code == 200  # noqa: PLR2004
+
+
+def test_client_gives_up_after_retries() -> None:
+    """Test that the client raises its own error when retries run out."""
+    clock = Clock()
+    client = OpenAlexClient(scheduler=_scheduler(clock, rate=0, max_retries=1))
+    client.session.get = lambda *_, **__: Response(500)  # type: ignore[method-assign]
+    with pytest.raises(OpenAlexError):
+        client.list_recent_articles("query", 10)
+    assert len(clock.sleeps) == 1
@@ -0,0 +1,78 @@
+import pickle
+
+import pytest
+
+from bibx.models.article import Article, IdSet
+
+
+def test_article_has_no_dict() -> None:
+    """Test that articles are slotted."""
+    article = Article(label="a", ids={"doi:a"})
+    assert not hasattr(article, "__dict__")
+
+
+def test_empty_defaults_can_be_changed() -> None:
+    """Test that each article gets its own empty containers to change."""
+    first = Article(label="a", ids={"doi:a"})
+    second = Article(label="b", ids={"doi:b"})
+    first.authors.append("Doe, J")
+    first.keywords.append("bits")
+    first.sources.add("wos")
+    first.extra["x"] = 1  # type: ignore[index]
+    assert second.authors == []
+    assert second.keywords == []
+    assert second.sources == set()
+    assert second.extra == {}
+    copy = pickle.loads(pickle.dumps(first))  # noqa: S301
+    assert copy == first
+
+
+def test_key_follows_changes_to_ids() -> None:
+    """Test that the cached key is updated when the ids change."""
+    article = Article(label="a", ids={"doi:b"}, authors=["Doe, J"], year=2020)
+    assert article.key == "doi:b"
+    article.add_simple_id()
+    assert article.key == "doi:b"
+    article.ids.add("doi:a")
+    assert article.key == "doi:a"
+    article.ids.discard("doi:a")
+    assert article.key == "doi:b"
+    article.ids -= {"doi:b"}
+    assert article.key == "simple:doe2020"
+    article.ids = {"openalex:W1"}
+    assert article.key == "openalex:W1"
+    merged = article.merge(Article(label="b", ids={"doi:c"}))
+    assert merged.key == "doi:c"
+
+
+def test_key_does_not_replace_the_ids() -> None:
+    """Test that the ids are shared with the caller and reading the key keeps them."""
+    ids = {"doi:b"}
+    article = Article(label="a", ids=ids)
+    assert article.key == "doi:b"
+    assert article.ids is ids
+    ids.add("doi:a")
+    assert article.key == "doi:a"
+    tracked = IdSet(("doi:c",))
+    article.ids = tracked
+    assert article.key == "doi:c"
+    assert article.ids is tracked
+
+
+def test_merge_many_keeps_the_pairwise_precedence() -> None:
+    """Test that an n-way merge gives the same article as pairwise merges."""
+    articles = [
+        Article(label="ab", ids={"doi:a"}, extra={"x": 1}),
+        Article(label="cd", ids={"simple:a"}, year=2000, authors=["A"]),
+        Article(label="e", ids={"doi:a"}, year=2001, title="T", extra={"x": 2}),
+    ]
+    merged = Article.merge_many(articles)
+    assert merged == articles[0].merge(articles[1]).merge(articles[2])
+    assert merged.label == "cd"
+    assert merged.ids == {"doi:a", "simple:a"}
+    assert merged.year == 2000  # noqa: PLR2004
+    assert merged.title == "T"
+    assert merged.authors == ["A"]
+    assert merged.extra == {"x": 2}
+    with pytest.raises(ValueError, match="At least one article"):
+        Article.merge_many([])
@@ -1,3 +1,6 @@
+import copy
+
+from bibx import read_wos
 from bibx.models.article import Article
 from bibx.models.collection import Collection
 
@@ -205,3 +208,175 @@ def test_cited_by_year() -> None:
     assert res.get(2021) == 12  # noqa: PLR2004
     assert res.get(2022) == 2  # noqa: PLR2004
     assert res.get(2023) == 0
+
+
+def test_lookup_indexes() -> None:
+    """Test that articles can be found by id, DOI, year, author and journal."""
+    collection = Collection(articles=list(articles))
+
+    assert collection.get_article("doi:12") is articles[1]
+    assert collection.get_article("doi:99") is None
+    assert collection.articles_with_doi("https://doi.org/12") == [articles[1]]
+    assert collection.articles_with_doi("DOI:13") == [articles[2]]
+    assert collection.articles_by_first_author(" b") == [articles[1]]
+    assert collection.articles_in_journal("ACC") == [articles[2]]
+    years = collection.articles_in_years(2005, 2010)
+    assert [a.label for a in years] == ["doi:15", "doi:16", "doi:1", "doi:17"]
+    assert len(collection.articles_in_years(end=2000)) == 2  # noqa: PLR2004
+    assert len(collection.articles_in_years(start=2022)) == 1
+
+
+def test_lookup_indexes_follow_changes() -> None:
+    """Test that the indexes are rebuilt when the articles change."""
+    collection = Collection(articles=list(articles))
+    assert collection.get_article("doi:20") is None
+
+    new = Article(label="doi:20", ids={"doi:20"}, year=2015)
+    collection.articles.append(new)
+    assert collection.get_article("doi:20") is new
+
+    collection.articles[-1] = Article(label="doi:21", ids={"doi:21"}, year=2016)
+    collection.invalidate_indexes()
+    assert collection.get_article("doi:20") is None
+    assert [a.label for a in collection.articles_in_years(2016, 2016)] == ["doi:21"]
+
+
+def test_citations_in_both_directions() -> None:
+    """Test that citations are indexed from the citing and the cited side."""
+    a = Article(label="a", ids={"a"})
+    b = Article(label="b", ids={"b"})
+    c = Article(label="c", ids={"c"}, references=[a, b, b])
+    d = Article(label="d", ids={"d"}, references=[b, Article(label="d", ids={"d"})])
+    b.references = [c]
+    collection = Collection([c, d, b])
+
+    citations = collection.citations
+    assert list(citations.edges()) == [("c", "a"), ("c", "b"), ("d", "b"), ("b", "c")]
+    assert list(citations.references(c)) == [a, b]
+    assert list(citations.cited_by(b)) == [c, d]
+    assert citations.in_degree(b) == 2  # noqa: PLR2004
+    assert citations.out_degree(d) == 1
+    assert citations.in_degree(d) == 0
+    assert collection.citations is citations
+
+    collection.articles.append(Article(label="e", ids={"e"}, references=[a]))
+    assert collection.citations.in_degree(a) == 2  # noqa: PLR2004
+
+
+def test_compact_citation_graph() -> None:
+    """Test that the citation graph is exported in sparse rows."""
+    a = Article(label="a", ids={"a"}, year=2001, times_cited=3)
+    b = Article(label="b", ids={"b"}, references=[a])
+    c = Article(label="c", ids={"c"}, year=2003, references=[a, b])
+    lonely = Article(label="lonely", ids={"lonely"})
+    collection = Collection([c, b, lonely])
+
+    graph = collection.to_csr()
+    assert graph.keys == ["c", "a", "b", "lonely"]
+    assert list(graph.offsets) == [0, 2, 2, 3, 3]
+    assert list(graph.targets) == [1, 2, 1]
+    assert list(graph.years) == [2003, 2001, -1, -1]
+    assert list(graph.times_cited) == [-1, 3, -1, -1]
+    assert graph.targets.itemsize == 4  # noqa: PLR2004
+    assert list(graph.in_degrees()) == [0, 2, 1, 0]
+    reverse = graph.transpose()
+    assert list(reverse.successors(1)) == [0, 2]
+    assert reverse.out_degree(0) == 0
+
+
+def _snapshot(collection: Collection) -> list[tuple[object, ...]]:
+    number: dict[int, int] = {}
+    return [
+        (
+            article.label,
+            sorted(article.ids),
+            article.year,
+            article.times_cited,
+            sorted(map(str, article.sources)),
+            [number.setdefault(id(r), len(number)) for r in article.references],
+            [(r.label, sorted(r.ids)) for r in article.references],
+        )
+        for article in collection.articles
+    ]
+
+
+def _read_examples() -> list[Collection]:
+    with open("docs/examples/bit-pattern-savedrecs.txt") as file:
+        wos = read_wos(file)
+    third = len(wos.articles) // 3
+    return [
+        Collection(wos.articles[:third]),
+        Collection(wos.articles[third : 2 * third]),
+        Collection(wos.articles[2 * third :]),
+    ]
+
+
+def test_merge_is_the_same_as_deduplicating_again() -> None:
+    """Test that merging one by one gives the same as deduplicating everything."""
+    first, *others = _read_examples()
+    expected = []
+    for other in others:
+        articles = first.articles + other.articles
+        first = Collection(Collection.deduplicate_articles(articles))
+        expected.append(_snapshot(first))
+
+    first, *others = _read_examples()
+    for other, snapshot in zip(others, expected, strict=True):
+        first = first.merge(other)
+        assert _snapshot(first) == snapshot
+
+    first, *others = _read_examples()
+    for other, snapshot in zip(others, expected, strict=True):
+        first.extend(other.articles)
+        assert _snapshot(first) == snapshot
+
+
+def test_merge_joins_groups_through_new_articles() -> None:
+    """Test that a new article with the ids of two articles merges them."""
+    cited = Article(label="cited", ids={"doi:2"})
+    first = Article(label="first", ids={"doi:1"}, references=[cited])
+    second = Article(label="second", ids={"wos:2"}, references=[cited])
+    collection = Collection([first, second])
+    bridge = Article(label="bridge article", ids={"doi:2", "wos:2"})
+
+    merged = collection.merge(Collection([bridge]))
+
+    assert [a.label for a in merged.articles] == ["first", "bridge article"]
+    assert merged.articles[1].ids == {"doi:2", "wos:2"}
+    assert merged.articles[0].references == [merged.articles[1]]
+
+
+def test_merge_after_changing_articles_in_place() -> None:
+    """Test that edits not reported to the collection are seen by the next merge."""
+    first, second, third = _read_examples()
+    first = first.merge(second)
+    # Give an article a new id, swap another one and cite a new article from
+    # a third one, all of them found again in the next batch
+    first.articles[0].ids.add("doi:added")
+    first.articles[1] = Article(label="new", ids={"doi:new"})
+    first.articles[2].references.append(Article(label="cited", ids={"doi:cited"}))
+    third.articles.extend(
+        Article(label=f"{id_} again", ids={id_})
+        for id_ in ("doi:added", "doi:new", "doi:cited")
+    )
+    articles = copy.deepcopy(first.articles + third.articles)
+    expected = _snapshot(Collection(Collection.deduplicate_articles(articles)))
+
+    before = _snapshot(first)
+    assert _snapshot(first.merge(third)) == expected
+    assert _snapshot(first) == before
+    first.extend(third.articles)
+    assert _snapshot(first) == expected
+
+
+def test_merge_does_not_change_the_merged_collections() -> None:
+    """Test that the articles of both collections are copied before changing them."""
+    first, second, third = _read_examples()
+    first = first.merge(second)
+    before = _snapshot(first), _snapshot(third)
+    references = [list(map(id, article.references)) for article in first.articles]
+
+    first.merge(third)
+
+    assert (_snapshot(first), _snapshot(third)) == before
+    assert [list(map(id, a.references)) for a in first.articles] == references